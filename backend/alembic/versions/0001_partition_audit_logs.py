@@ -0,0 +1,137 @@
+"""partition audit_logs by month
+
+On PostgreSQL ``audit_logs`` becomes a range-partitioned table with one
+partition per month plus a default partition; existing rows are copied
+across. On SQLite only a ``timestamp`` index is added and months are
+handled as index ranges by ``app.audit_partitions``.
+
+On an empty database the application's tables are created first from the
+models, since ``audit_logs`` references ``users``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PREMAKE_MONTHS = 3
+
+
+def _add_months(dt: datetime, months: int) -> datetime:
+    index = dt.year * 12 + dt.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _create_base_schema(bind, exclude: Sequence[str] = ()) -> None:
+    from app.models import Base
+    Base.metadata.create_all(bind, tables=[t for t in Base.metadata.sorted_tables if t.name not in exclude])
+
+
+def _create_partitioned_table() -> None:
+    op.execute("CREATE SEQUENCE IF NOT EXISTS audit_logs_id_seq")
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            action VARCHAR(50) NOT NULL,
+            entity_type VARCHAR(50) NOT NULL,
+            entity_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            changes JSON,
+            ip_address VARCHAR(50),
+            user_agent VARCHAR(500),
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+    op.execute("CREATE INDEX ix_audit_logs_timestamp ON audit_logs (timestamp)")
+
+
+def _create_month_partitions(first: datetime, last: datetime) -> None:
+    month = datetime(first.year, first.month, 1)
+    while month <= last:
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS audit_logs_p{month:%Y_%m} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        )
+        month = end
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    fresh = not sa.inspect(bind).has_table("users")
+    if bind.dialect.name != "postgresql":
+        if fresh:
+            _create_base_schema(bind)
+        op.execute("CREATE INDEX IF NOT EXISTS ix_audit_logs_timestamp ON audit_logs (timestamp)")
+        return
+
+    now = datetime.utcnow()
+    exists = bind.execute(sa.text("SELECT to_regclass('audit_logs')")).scalar() is not None
+    if not exists:
+        if fresh:
+            _create_base_schema(bind, exclude=["audit_logs"])
+        _create_partitioned_table()
+        _create_month_partitions(now, _add_months(now, PREMAKE_MONTHS))
+        return
+
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_legacy")
+    op.execute("ALTER TABLE audit_logs_legacy ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER SEQUENCE IF EXISTS audit_logs_id_seq OWNED BY NONE")
+    op.execute("DROP INDEX IF EXISTS ix_audit_logs_id")
+    op.execute("DROP INDEX IF EXISTS ix_audit_logs_timestamp")
+    _create_partitioned_table()
+
+    oldest = bind.execute(sa.text("SELECT min(timestamp) FROM audit_logs_legacy")).scalar()
+    _create_month_partitions(oldest or now, _add_months(now, PREMAKE_MONTHS))
+    op.execute("""
+        INSERT INTO audit_logs (id, action, entity_type, entity_id, user_id, changes,
+                                ip_address, user_agent, timestamp)
+        SELECT id, action, entity_type, entity_id, user_id, changes,
+               ip_address, user_agent, coalesce(timestamp, now() AT TIME ZONE 'utc')
+        FROM audit_logs_legacy
+    """)
+    op.execute(
+        "SELECT setval('audit_logs_id_seq', coalesce((SELECT max(id) FROM audit_logs), 0) + 1, false)"
+    )
+    op.execute("DROP TABLE audit_logs_legacy")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_audit_logs_timestamp")
+        return
+
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER INDEX ix_audit_logs_timestamp RENAME TO ix_audit_logs_partitioned_timestamp")
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER PRIMARY KEY DEFAULT nextval('audit_logs_id_seq'),
+            action VARCHAR(50) NOT NULL,
+            entity_type VARCHAR(50) NOT NULL,
+            entity_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            changes JSON,
+            ip_address VARCHAR(50),
+            user_agent VARCHAR(500),
+            timestamp TIMESTAMP WITHOUT TIME ZONE
+        )
+    """)
+    op.execute("INSERT INTO audit_logs SELECT * FROM audit_logs_partitioned")
+    op.execute("DROP TABLE audit_logs_partitioned")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute("CREATE INDEX ix_audit_logs_id ON audit_logs (id)")
+    op.execute("CREATE INDEX ix_audit_logs_timestamp ON audit_logs (timestamp)")
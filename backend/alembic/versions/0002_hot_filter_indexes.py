@@ -0,0 +1,38 @@
+"""composite indexes for hot filters
+
+Indexes the columns the routers filter on: asset status/category/assignee,
+open checkouts per asset, and audit trails per entity and per user. Uses
+``IF NOT EXISTS`` because ``create_all`` at startup already creates them
+on fresh databases.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_assets_status_category", "assets", ["status", "category"]),
+    ("ix_assets_category", "assets", ["category"]),
+    ("ix_assets_assigned_to_status", "assets", ["assigned_to", "status"]),
+    ("ix_checkout_history_asset_checkin", "checkout_history", ["asset_id", "checkin_date"]),
+    ("ix_audit_logs_entity", "audit_logs", ["entity_type", "entity_id", "timestamp"]),
+    ("ix_audit_logs_user_timestamp", "audit_logs", ["user_id", "timestamp"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
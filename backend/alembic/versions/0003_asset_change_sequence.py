@@ -0,0 +1,62 @@
+"""asset change sequence and tombstones for delta sync
+
+Adds ``assets.change_seq`` (existing rows get 0, so the first sync returns
+them all), the ``change_sequence`` counter rows and ``asset_tombstones``.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("assets")}
+    if "change_seq" not in columns:
+        with op.batch_alter_table("assets") as batch:
+            batch.add_column(sa.Column("change_seq", sa.BigInteger(), nullable=False, server_default="0"))
+    op.create_index("ix_assets_change_seq", "assets", ["change_seq", "id"], if_not_exists=True)
+    
+    op.create_table(
+        "change_sequence",
+        sa.Column("name", sa.String(50), primary_key=True),
+        sa.Column("value", sa.BigInteger(), nullable=False),
+        if_not_exists=True,
+    )
+    op.execute(
+        "INSERT INTO change_sequence (name, value) "
+        "SELECT 'assets', 0 WHERE NOT EXISTS (SELECT 1 FROM change_sequence WHERE name = 'assets')"
+    )
+    op.execute(
+        "INSERT INTO change_sequence (name, value) "
+        "SELECT 'asset_tombstones_pruned', 0 "
+        "WHERE NOT EXISTS (SELECT 1 FROM change_sequence WHERE name = 'asset_tombstones_pruned')"
+    )
+    
+    op.create_table(
+        "asset_tombstones",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("asset_id", sa.Integer(), nullable=False),
+        sa.Column("asset_tag", sa.String(50), nullable=False),
+        sa.Column("change_seq", sa.BigInteger(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime()),
+        if_not_exists=True,
+    )
+    op.create_index("ix_asset_tombstones_change_seq", "asset_tombstones", ["change_seq", "asset_id"], if_not_exists=True)
+    op.create_index("ix_asset_tombstones_deleted_at", "asset_tombstones", ["deleted_at"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_table("asset_tombstones")
+    op.drop_table("change_sequence")
+    op.drop_index("ix_assets_change_seq", table_name="assets", if_exists=True)
+    with op.batch_alter_table("assets") as batch:
+        batch.drop_column("change_seq")
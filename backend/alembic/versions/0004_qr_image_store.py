@@ -0,0 +1,114 @@
+"""move QR PNGs from assets.qr_code into qr_images
+
+Creates the content-addressed ``qr_images`` table, copies every stored
+base64 PNG into it under its key, points ``assets.qr_key`` at it and drops
+``assets.qr_code``. Keys are computed as ``app.qr_store.qr_key`` did when
+this revision was written (payload ``asset://<tag>``, QR version 1, box 10,
+border 4), so later layout changes don't alter this migration.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+import base64
+import hashlib
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+qr_images = sa.table(
+    "qr_images",
+    sa.column("key", sa.String),
+    sa.column("png", sa.LargeBinary),
+    sa.column("created_at", sa.DateTime),
+)
+
+
+def qr_key(asset_tag: str) -> str:
+    return hashlib.sha256(f"asset://{asset_tag}|1|10|4".encode()).hexdigest()
+
+
+def _columns() -> set:
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns("assets")}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "qr_images",
+        sa.Column("key", sa.String(64), primary_key=True),
+        sa.Column("png", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        if_not_exists=True,
+    )
+    columns = _columns()
+    if "qr_key" not in columns:
+        with op.batch_alter_table("assets") as batch:
+            batch.add_column(sa.Column("qr_key", sa.String(64)))
+    if "qr_code" not in columns:
+        return
+    
+    bind = op.get_bind()
+    assets = sa.table("assets", sa.column("id", sa.Integer), sa.column("asset_tag", sa.String),
+                      sa.column("qr_code", sa.Text), sa.column("qr_key", sa.String))
+    now = datetime.utcnow()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(assets.c.id, assets.c.asset_tag, assets.c.qr_code)
+            .where(assets.c.id > last_id, assets.c.qr_code.isnot(None))
+            .order_by(assets.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        keys = {row.id: qr_key(row.asset_tag) for row in rows}
+        existing = set(bind.execute(
+            sa.select(qr_images.c.key).where(qr_images.c.key.in_(set(keys.values())))
+        ).scalars())
+        images = {}
+        for row in rows:
+            if keys[row.id] not in existing:
+                images[keys[row.id]] = base64.b64decode(row.qr_code)
+        if images:
+            bind.execute(qr_images.insert(), [
+                {"key": key, "png": png, "created_at": now} for key, png in images.items()
+            ])
+        bind.execute(
+            assets.update().where(assets.c.id == sa.bindparam("asset_id")).values(qr_key=sa.bindparam("new_key")),
+            [{"asset_id": asset_id, "new_key": key} for asset_id, key in keys.items()]
+        )
+    
+    with op.batch_alter_table("assets") as batch:
+        batch.drop_column("qr_code")
+
+
+def downgrade() -> None:
+    if "qr_code" not in _columns():
+        with op.batch_alter_table("assets") as batch:
+            batch.add_column(sa.Column("qr_code", sa.Text()))
+    
+    bind = op.get_bind()
+    assets = sa.table("assets", sa.column("id", sa.Integer),
+                      sa.column("qr_code", sa.Text), sa.column("qr_key", sa.String))
+    rows = bind.execute(
+        sa.select(assets.c.id, qr_images.c.png).join(qr_images, qr_images.c.key == assets.c.qr_key)
+    ).fetchall()
+    if rows:
+        bind.execute(
+            assets.update().where(assets.c.id == sa.bindparam("asset_id")).values(qr_code=sa.bindparam("png64")),
+            [{"asset_id": row.id, "png64": base64.b64encode(row.png).decode()} for row in rows]
+        )
+    
+    with op.batch_alter_table("assets") as batch:
+        batch.drop_column("qr_key")
+    op.drop_table("qr_images")
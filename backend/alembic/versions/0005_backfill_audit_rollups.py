@@ -0,0 +1,82 @@
+"""audit rollups, backfilled from existing audit rows
+
+Creates ``audit_rollups`` and adds the audit rows the application has not
+rolled up into their hourly and daily buckets. The application may already
+have started (``create_all`` creates the table) and counted rows as it wrote
+them; its earliest hourly bucket is the cutoff, and only rows before it are
+added, on top of whatever the buckets already hold. A re-run finds the
+backfilled buckets and adds nothing.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+from collections import Counter
+from datetime import datetime
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+KEY = ["period", "bucket", "action", "entity_type", "user_id"]
+
+
+def _buckets(ts: datetime):
+    yield "hour", ts.replace(minute=0, second=0, microsecond=0)
+    yield "day", datetime(ts.year, ts.month, ts.day)
+
+
+def upgrade() -> None:
+    rollups = op.create_table(
+        "audit_rollups",
+        sa.Column("period", sa.String(4), primary_key=True),
+        sa.Column("bucket", sa.DateTime(), primary_key=True),
+        sa.Column("action", sa.String(50), primary_key=True),
+        sa.Column("entity_type", sa.String(50), primary_key=True),
+        sa.Column("user_id", sa.Integer(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+    bind = op.get_bind()
+    cutoff = bind.execute(sa.select(sa.func.min(rollups.c.bucket)).where(rollups.c.period == "hour")).scalar()
+    
+    audit_logs = sa.table("audit_logs", sa.column("timestamp", sa.DateTime), sa.column("action", sa.String),
+                          sa.column("entity_type", sa.String), sa.column("user_id", sa.Integer))
+    counts: Counter = Counter()
+    result = bind.execution_options(stream_results=True, yield_per=BATCH_SIZE).execute(
+        sa.select(audit_logs.c.timestamp, audit_logs.c.action, audit_logs.c.entity_type, audit_logs.c.user_id)
+        .where(audit_logs.c.timestamp.isnot(None) if cutoff is None else audit_logs.c.timestamp < cutoff)
+    )
+    for partition in result.partitions():
+        for ts, action, entity_type, user_id in partition:
+            for period, bucket in _buckets(ts):
+                counts[(period, bucket, action, entity_type, user_id)] += 1
+    rows = [dict(zip(KEY, key), count=n) for key, n in counts.items()]
+    
+    dialect = bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        # The day holding the cutoff may already have counts from the application
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(rollups)
+        stmt = stmt.on_conflict_do_update(index_elements=KEY, set_={"count": rollups.c.count + stmt.excluded.count})
+        for i in range(0, len(rows), BATCH_SIZE):
+            bind.execute(stmt, rows[i:i + BATCH_SIZE])
+        return
+    for row in rows:
+        result = bind.execute(
+            rollups.update()
+            .where(*[rollups.c[name] == row[name] for name in KEY])
+            .values(count=rollups.c.count + row["count"])
+        )
+        if result.rowcount == 0:
+            bind.execute(rollups.insert(), [row])
+
+
+def downgrade() -> None:
+    op.drop_table("audit_rollups", if_exists=True)
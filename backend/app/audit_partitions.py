@@ -0,0 +1,195 @@
+"""Monthly audit log partitions, retention and archival.
+
+On PostgreSQL ``audit_logs`` is a native range-partitioned table (see the
+``0001_partition_audit_logs`` migration); this module keeps partitions
+created ahead of time and the planner prunes date-filtered queries to the
+months they touch. On SQLite a month is a range of the indexed
+``timestamp`` column, which gives the same pruning for range scans.
+
+Months older than ``AUDIT_RETENTION_MONTHS`` are exported to gzipped JSON
+Lines files in ``AUDIT_ARCHIVE_DIR`` and then removed: the partition is
+dropped if nothing was written to it during the export, otherwise exactly
+the exported rows are deleted. On PostgreSQL one worker at a time runs the
+maintenance loop, under an advisory lock.
+"""
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy import select, delete, func, text
+from datetime import datetime
+from typing import List, Optional
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+from .config import settings
+from .database import AsyncSessionLocal, advisory_lock, engine
+from .models import AuditLog
+from .sync import prune_tombstones
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_NAME = re.compile(r"^audit_logs_(\d{4})_(\d{2})\.jsonl\.gz$")
+
+def month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+def add_months(dt: datetime, months: int) -> datetime:
+    index = dt.year * 12 + dt.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: datetime) -> str:
+    return f"audit_logs_p{month:%Y_%m}"
+
+def archive_path(month: datetime) -> str:
+    return os.path.join(settings.AUDIT_ARCHIVE_DIR, f"audit_logs_{month:%Y_%m}.jsonl.gz")
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    result = await conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'audit_logs'"
+    ))
+    return result.scalar() is not None
+
+async def ensure_partitions(conn: AsyncConnection, months_ahead: Optional[int] = None):
+    """Create this month's partition and the next few so inserts never hit the default"""
+    if not await is_partitioned(conn):
+        if conn.dialect.name == "postgresql":
+            logger.warning("audit_logs is not partitioned; run `alembic upgrade head`")
+        return
+    months_ahead = settings.AUDIT_PARTITION_PREMAKE if months_ahead is None else months_ahead
+    current = month_start(datetime.utcnow())
+    for i in range(months_ahead + 1):
+        start = add_months(current, i)
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(start)} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{add_months(start, 1):%Y-%m-%d}')"
+        ))
+
+async def list_partitions(db: AsyncSession) -> List[dict]:
+    """Months currently held in audit_logs with (estimated on PostgreSQL) row counts"""
+    conn = await db.connection()
+    if await is_partitioned(conn):
+        result = await conn.execute(text(
+            "SELECT c.relname, c.reltuples::bigint FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'audit_logs' ORDER BY c.relname"
+        ))
+        return [{"partition": name, "rows": max(rows, 0)} for name, rows in result.fetchall()]
+    month = func.strftime("%Y_%m", AuditLog.timestamp) if conn.dialect.name == "sqlite" \
+        else func.to_char(AuditLog.timestamp, "YYYY_MM")
+    result = await db.execute(
+        select(month, func.count(AuditLog.id)).group_by(month).order_by(month)
+    )
+    return [{"partition": f"audit_logs_p{m}", "rows": n} for m, n in result.fetchall()]
+
+def list_archives() -> List[dict]:
+    if not os.path.isdir(settings.AUDIT_ARCHIVE_DIR):
+        return []
+    return [
+        {"name": name, "bytes": os.path.getsize(os.path.join(settings.AUDIT_ARCHIVE_DIR, name))}
+        for name in sorted(os.listdir(settings.AUDIT_ARCHIVE_DIR)) if ARCHIVE_NAME.match(name)
+    ]
+
+def _finish_archive(partial: str, path: str, count: int):
+    if count == 0:
+        os.remove(partial)
+    elif os.path.exists(path):
+        # Late rows for an already archived month become another gzip member
+        with open(path, "ab") as dst, open(partial, "rb") as src:
+            shutil.copyfileobj(src, dst)
+        os.remove(partial)
+    else:
+        os.replace(partial, path)
+
+async def archive_month(db: AsyncSession, month: datetime) -> int:
+    """Export one month to a gzipped JSONL archive, then remove it from the database"""
+    start, end = month_start(month), add_months(month_start(month), 1)
+    await asyncio.to_thread(os.makedirs, settings.AUDIT_ARCHIVE_DIR, exist_ok=True)
+    path = archive_path(start)
+    partial = f"{path}.{os.getpid()}.partial"
+    count = 0
+    last_id = 0
+    
+    result = await db.stream(
+        select(AuditLog)
+        .filter(AuditLog.timestamp >= start, AuditLog.timestamp < end)
+        .order_by(AuditLog.id)
+        .execution_options(yield_per=1000)
+    )
+    # Compression and disk writes run in a thread, one batch at a time
+    out = await asyncio.to_thread(gzip.open, partial, "wt", encoding="utf-8")
+    try:
+        async for partition in result.scalars().partitions():
+            lines = []
+            for log in partition:
+                lines.append(json.dumps({
+                    "id": log.id, "action": log.action, "entity_type": log.entity_type,
+                    "entity_id": log.entity_id, "user_id": log.user_id, "changes": log.changes,
+                    "ip_address": log.ip_address, "user_agent": log.user_agent,
+                    "timestamp": log.timestamp.isoformat() if log.timestamp else None,
+                }, default=str) + "\n")
+                last_id = log.id
+            count += len(lines)
+            db.expunge_all()
+            await asyncio.to_thread(out.write, "".join(lines))
+    finally:
+        await asyncio.to_thread(out.close)
+    await asyncio.to_thread(_finish_archive, partial, path, count)
+    
+    conn = await db.connection()
+    if await is_partitioned(conn):
+        name = partition_name(start)
+        exists = await conn.execute(text("SELECT to_regclass(:name)"), {"name": name})
+        if exists.scalar() is not None:
+            # Block inserts until commit, then drop the partition only if every row in it was exported
+            await conn.execute(text("LOCK TABLE audit_logs IN SHARE ROW EXCLUSIVE MODE"))
+            newest = (await conn.execute(text(f"SELECT max(id) FROM {name}"))).scalar()
+            if newest is None or newest <= last_id:
+                await conn.execute(text(f"ALTER TABLE audit_logs DETACH PARTITION {name}"))
+                await conn.execute(text(f"DROP TABLE {name}"))
+    # Only delete what was exported; rows written meanwhile go in the next archive run.
+    # On PostgreSQL this also covers a partition that got late rows, and the default partition.
+    await db.execute(
+        delete(AuditLog).where(
+            AuditLog.timestamp >= start, AuditLog.timestamp < end, AuditLog.id <= last_id
+        )
+    )
+    await db.commit()
+    logger.info(f"Archived {count} audit rows for {start:%Y-%m} to {path}")
+    return count
+
+async def apply_retention(db: AsyncSession) -> List[dict]:
+    """Archive every month older than the retention window that still has rows"""
+    if settings.AUDIT_RETENTION_MONTHS <= 0:
+        return []
+    cutoff = add_months(month_start(datetime.utcnow()), -settings.AUDIT_RETENTION_MONTHS)
+    archived = []
+    while True:
+        result = await db.execute(select(func.min(AuditLog.timestamp)).filter(AuditLog.timestamp < cutoff))
+        oldest = result.scalar()
+        if oldest is None:
+            return archived
+        month = month_start(oldest)
+        rows = await archive_month(db, month)
+        archived.append({"month": f"{month:%Y-%m}", "rows": rows})
+
+async def run_maintenance_loop():
+    """Background task: keep partitions ahead, archive expired months, prune sync tombstones"""
+    while True:
+        try:
+            # Every worker runs this loop; one of them does the work each round
+            async with advisory_lock("audit_maintenance") as held:
+                if held:
+                    async with engine.begin() as conn:
+                        await ensure_partitions(conn)
+                    async with AsyncSessionLocal() as db:
+                        await apply_retention(db)
+                    async with AsyncSessionLocal() as db:
+                        await prune_tombstones(db)
+        except Exception as e:
+            logger.error(f"Audit partition maintenance failed: {e}")
+        await asyncio.sleep(settings.AUDIT_MAINTENANCE_INTERVAL)
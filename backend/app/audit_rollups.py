@@ -0,0 +1,112 @@
+"""Hourly and daily audit rollups for summaries and charts.
+
+Every audit write also adds to per-hour and per-day counts of
+(action, entity_type, user_id) in the same transaction, so a summary over
+any window reads whole days and hours from ``audit_rollups`` and only the
+partial leading hour from ``audit_logs``. Rollups outlive archived months.
+Rows written before rollups existed are counted once by migration ``0005``.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, insert, func, and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from .models import AuditLog, AuditRollup
+
+PERIODS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+def truncate(ts: datetime, period: str) -> datetime:
+    if period == "day":
+        return datetime(ts.year, ts.month, ts.day)
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+def ceil(ts: datetime, period: str) -> datetime:
+    start = truncate(ts, period)
+    return start if start == ts else start + PERIODS[period]
+
+def _rollup_rows(entries: Iterable[dict]) -> List[dict]:
+    counts: Counter = Counter()
+    now = datetime.utcnow()
+    for entry in entries:
+        ts = entry.get("timestamp") or now
+        if isinstance(ts, str):
+            ts = datetime.fromisoformat(ts)
+        for period in PERIODS:
+            counts[(period, truncate(ts, period), entry["action"], entry["entity_type"], entry["user_id"])] += 1
+    return [
+        {"period": p, "bucket": b, "action": a, "entity_type": e, "user_id": u, "count": n}
+        for (p, b, a, e, u), n in counts.items()
+    ]
+
+async def add_audit_rollups(db: AsyncSession, entries: Iterable[dict]):
+    """Count audit entries (AuditLog column dicts) into the rollups, in the caller's transaction"""
+    rows = _rollup_rows(entries)
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        upsert = (postgresql if dialect == "postgresql" else sqlite).insert(AuditRollup.__table__)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=["period", "bucket", "action", "entity_type", "user_id"],
+            set_={"count": AuditRollup.__table__.c.count + upsert.excluded.count}
+        )
+        await db.execute(upsert, rows)
+        return
+    for row in rows:
+        result = await db.execute(
+            update(AuditRollup)
+            .filter(
+                AuditRollup.period == row["period"], AuditRollup.bucket == row["bucket"],
+                AuditRollup.action == row["action"], AuditRollup.entity_type == row["entity_type"],
+                AuditRollup.user_id == row["user_id"]
+            )
+            .values(count=AuditRollup.count + row["count"])
+        )
+        if result.rowcount == 0:
+            await db.execute(insert(AuditRollup), [row])
+
+async def summarize(db: AsyncSession, since: datetime) -> Dict[Tuple[str, str, int], int]:
+    """Counts per (action, entity_type, user_id) from ``since`` until now.
+    
+    Whole days come from daily rollups, whole hours before the first full day
+    from hourly rollups, and the partial first hour from ``audit_logs``.
+    """
+    first_hour, first_day = ceil(since, "hour"), ceil(since, "day")
+    result = await db.execute(
+        select(AuditRollup.action, AuditRollup.entity_type, AuditRollup.user_id, func.sum(AuditRollup.count))
+        .filter(or_(
+            and_(AuditRollup.period == "hour", AuditRollup.bucket >= first_hour, AuditRollup.bucket < first_day),
+            and_(AuditRollup.period == "day", AuditRollup.bucket >= first_day),
+        ))
+        .group_by(AuditRollup.action, AuditRollup.entity_type, AuditRollup.user_id)
+    )
+    counts = Counter({(a, e, u): n for a, e, u, n in result.fetchall()})
+    if since < first_hour:
+        result = await db.execute(
+            select(AuditLog.action, AuditLog.entity_type, AuditLog.user_id, func.count(AuditLog.id))
+            .filter(AuditLog.timestamp >= since, AuditLog.timestamp < first_hour)
+            .group_by(AuditLog.action, AuditLog.entity_type, AuditLog.user_id)
+        )
+        counts.update({(a, e, u): n for a, e, u, n in result.fetchall()})
+    return counts
+
+async def series(db: AsyncSession, since: datetime, period: str, action: Optional[str] = None,
+                 entity_type: Optional[str] = None) -> List[dict]:
+    """Per-bucket totals and per-action counts for charting, oldest first"""
+    query = (
+        select(AuditRollup.bucket, AuditRollup.action, func.sum(AuditRollup.count))
+        .filter(AuditRollup.period == period, AuditRollup.bucket >= truncate(since, period))
+        .group_by(AuditRollup.bucket, AuditRollup.action)
+        .order_by(AuditRollup.bucket)
+    )
+    if action:
+        query = query.filter(AuditRollup.action == action)
+    if entity_type:
+        query = query.filter(AuditRollup.entity_type == entity_type)
+    points: Dict[datetime, dict] = {}
+    for bucket, row_action, count in (await db.execute(query)).fetchall():
+        point = points.setdefault(bucket, {"bucket": bucket, "total": 0, "actions": {}})
+        point["actions"][row_action] = count
+        point["total"] += count
+    return list(points.values())
@@ -0,0 +1,233 @@
+"""Buffered audit log pipeline.
+
+With ``AUDIT_MODE=buffered`` audit events are held on the request's session
+until it commits, then appended to a local spool file and an in-memory
+buffer. A background task writes them to ``audit_logs`` in batched inserts.
+The spool is rotated atomically with each drain and deleted once the batch
+commits, so events survive a crash and are replayed on startup
+(at-least-once). Spool files carry the worker's pid so several uvicorn
+workers can share one spool directory. ``AUDIT_MODE=sync`` keeps writing
+audit rows in the request's own transaction.
+"""
+from sqlalchemy import insert, event
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from .config import settings
+from .database import AsyncSessionLocal
+from .models import AuditLog
+from .audit_rollups import add_audit_rollups
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "pending_audit_events"
+
+class AuditWriter:
+    def __init__(self, spool_path: str, max_queue: int, flush_size: int, flush_interval: float):
+        self.spool_base = spool_path
+        self.max_queue = max_queue
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer: List[dict] = []
+        self._flushing_files: List[str] = []
+        self._spool = None
+        self._rotation = 0
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = {
+            "enqueued": 0, "flushed": 0, "flushes": 0, "flush_failures": 0,
+            "backpressure_waits": 0, "backpressure_seconds": 0.0,
+            "max_queue_depth": 0, "last_flush_ms": 0.0,
+        }
+    
+    @property
+    def spool_path(self) -> str:
+        return f"{self.spool_base}.{os.getpid()}.active"
+    
+    @property
+    def queue_depth(self) -> int:
+        return len(self._buffer)
+    
+    def snapshot(self) -> dict:
+        return {"mode": settings.AUDIT_MODE, "queue_depth": self.queue_depth, **self.metrics}
+    
+    async def reserve(self):
+        """Wait for buffer space before a request records an event (backpressure)"""
+        if self.queue_depth < self.max_queue:
+            return
+        self.metrics["backpressure_waits"] += 1
+        started = time.perf_counter()
+        self._wakeup.set()
+        while self.queue_depth >= self.max_queue:
+            self._space.clear()
+            await self._space.wait()
+        self.metrics["backpressure_seconds"] += time.perf_counter() - started
+    
+    def submit(self, events: List[dict]):
+        """Spool and buffer events from a committed transaction"""
+        if self._spool is None:
+            self._spool = open(self.spool_path, "a", encoding="utf-8")
+        for ev in events:
+            self._spool.write(json.dumps(ev, default=str) + "\n")
+        self._spool.flush()
+        if settings.AUDIT_SPOOL_FSYNC:
+            os.fsync(self._spool.fileno())
+        self._buffer.extend(events)
+        self.metrics["enqueued"] += len(events)
+        self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], self.queue_depth)
+        if self.queue_depth >= self.flush_size:
+            self._wakeup.set()
+    
+    def _drain(self) -> List[dict]:
+        """Take everything buffered and rotate the spool file that holds it.
+        
+        No await happens here, so the rotated file holds exactly the drained events.
+        """
+        events, self._buffer = self._buffer, []
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+            self._rotation += 1
+            flushing = f"{self.spool_base}.{os.getpid()}.{self._rotation}.flushing"
+            os.replace(self.spool_path, flushing)
+            self._flushing_files.append(flushing)
+        self._space.set()
+        return events
+    
+    async def flush(self) -> bool:
+        """Write buffered events; on failure they go back to the buffer (and count against it)"""
+        events = self._drain()
+        if not events:
+            return True
+        started = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as session:
+                for i in range(0, len(events), self.flush_size):
+                    rows = [_to_row(e) for e in events[i:i + self.flush_size]]
+                    await session.execute(insert(AuditLog), rows)
+                    await add_audit_rollups(session, rows)
+                await session.commit()
+        except Exception as e:
+            self.metrics["flush_failures"] += 1
+            logger.error(f"Audit flush of {len(events)} events failed, will retry: {e}")
+            # Their rotated spool files stay on disk until a flush succeeds
+            self._buffer[:0] = events
+            return False
+        for path in self._flushing_files:
+            os.remove(path)
+        self._flushing_files = []
+        self.metrics["flushes"] += 1
+        self.metrics["flushed"] += len(events)
+        self.metrics["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return True
+    
+    async def _run(self):
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                if not await self.flush():
+                    # Back off rather than retrying every time a blocked request wakes us
+                    await asyncio.sleep(self.flush_interval)
+        except asyncio.CancelledError:
+            await self.flush()
+            raise
+    
+    async def replay_spool(self):
+        """Re-insert events left in spool files by workers that are no longer running"""
+        for path in sorted(glob.glob(f"{self.spool_base}.*")):
+            pid = path[len(self.spool_base) + 1:].split(".")[0]
+            if not pid.isdigit() or _pid_alive(int(pid)):
+                continue
+            # Claim the file under our own pid so other starting workers skip it
+            self._rotation += 1
+            claimed = f"{self.spool_base}.{os.getpid()}.{self._rotation}.replaying"
+            try:
+                os.replace(path, claimed)
+            except FileNotFoundError:
+                continue
+            path = claimed
+            with open(path, encoding="utf-8") as f:
+                events = [json.loads(line) for line in f if line.strip()]
+            if events:
+                async with AsyncSessionLocal() as session:
+                    rows = [_to_row(e) for e in events]
+                    await session.execute(insert(AuditLog), rows)
+                    await add_audit_rollups(session, rows)
+                    await session.commit()
+                logger.info(f"Replayed {len(events)} spooled audit events from {path}")
+            os.remove(path)
+    
+    async def start(self):
+        await self.replay_spool()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _to_row(ev: dict) -> dict:
+    row = dict(ev)
+    if isinstance(row.get("timestamp"), str):
+        row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+    return row
+
+audit_writer = AuditWriter(
+    settings.AUDIT_SPOOL_PATH, settings.AUDIT_QUEUE_SIZE,
+    settings.AUDIT_FLUSH_SIZE, settings.AUDIT_FLUSH_INTERVAL
+)
+
+async def enqueue_audit(session, event_row: dict):
+    """Hold an audit event on the session until it commits"""
+    await audit_writer.reserve()
+    event_row.setdefault("timestamp", datetime.utcnow())
+    session.sync_session.info.setdefault(PENDING_KEY, []).append(event_row)
+
+async def record_audit_rows(session, rows: List[dict]):
+    """Audit rows from a bulk path: buffered per AUDIT_MODE, else inserted in this transaction"""
+    if settings.AUDIT_MODE == "buffered":
+        await audit_writer.reserve()
+        now = datetime.utcnow()
+        for row in rows:
+            row.setdefault("timestamp", now)
+        session.sync_session.info.setdefault(PENDING_KEY, []).extend(rows)
+    else:
+        await session.execute(insert(AuditLog), rows)
+        await add_audit_rollups(session, rows)
+
+@event.listens_for(Session, "after_commit")
+def _submit_pending_audit(session):
+    events = session.info.pop(PENDING_KEY, None)
+    if events:
+        audit_writer.submit(events)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_audit(session):
+    session.info.pop(PENDING_KEY, None)
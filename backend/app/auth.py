@@ -4,16 +4,28 @@ from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
+from fastapi.requests import HTTPConnection
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy import select, event, inspect
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
 from .config import settings
-from .database import get_db
+from .database import get_db, AsyncSessionLocal
 from .models import User, UserRole
+from .cache import TTLCache
+from .shared_cache import invalidation_bus
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/login")
 
+# Short-lived caches so authenticated requests skip the JWT decode and the users SELECT
+token_cache = TTLCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL)
+principal_cache = TTLCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -22,6 +34,77 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+class HashPoolMetrics:
+    """Queue depth and timing for the password hashing pool"""
+    
+    def __init__(self):
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+    
+    def snapshot(self) -> dict:
+        done = self.completed or 1
+        return {
+            "workers": settings.PASSWORD_HASH_WORKERS,
+            "queue_depth": self.queued,
+            "active": self.active,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_wait_ms": round(self.wait_seconds / done * 1000, 1),
+            "avg_run_ms": round(self.run_seconds / done * 1000, 1),
+        }
+
+hash_metrics = HashPoolMetrics()
+_metrics_lock = threading.Lock()
+_hash_pool = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
+def _timed(fn, submitted: float, *args):
+    started = time.perf_counter()
+    with _metrics_lock:
+        hash_metrics.queued -= 1
+        hash_metrics.active += 1
+        hash_metrics.wait_seconds += started - submitted
+    try:
+        return fn(*args)
+    finally:
+        with _metrics_lock:
+            hash_metrics.active -= 1
+            hash_metrics.completed += 1
+            hash_metrics.run_seconds += time.perf_counter() - started
+
+async def _run_in_hash_pool(fn, *args):
+    """Run bcrypt in the bounded thread pool, shedding load once the queue is full"""
+    if hash_metrics.queued >= settings.PASSWORD_HASH_MAX_QUEUE:
+        hash_metrics.rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent logins, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    with _metrics_lock:
+        hash_metrics.queued += 1
+        hash_metrics.max_queue_depth = max(hash_metrics.max_queue_depth, hash_metrics.queued)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, _timed, fn, time.perf_counter(), *args)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password off the event loop"""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash off the event loop"""
+    return await _run_in_hash_pool(get_password_hash, password)
+
+def shutdown_hash_pool():
+    _hash_pool.shutdown(wait=False, cancel_futures=True)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -41,31 +124,91 @@ def create_refresh_token(data: dict) -> str:
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def decode_access_token(token: str) -> Optional[dict]:
+    """Decode and validate an access token, caching the payload until it expires"""
+    payload = token_cache.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return None
+        if payload.get("sub") is None or payload.get("type") != "access":
+            return None
+        token_cache.set(token, payload)
+    elif payload.get("exp", 0) <= time.time():
+        token_cache.delete(token)
+        return None
+    return payload
+
+def snapshot_user(user: User) -> User:
+    """Detached copy of a user's columns, safe to share across sessions"""
+    mapper = inspect(User)
+    return User(**{attr.key: getattr(user, attr.key) for attr in mapper.column_attrs})
+
+def invalidate_user(user_id: int):
+    """Drop a cached principal, e.g. after a role change or deactivation"""
+    principal_cache.delete(int(user_id))
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed_users(session, flush_context):
+    changed = [obj.id for obj in list(session.dirty) + list(session.deleted) if isinstance(obj, User)]
+    if changed:
+        session.info.setdefault("invalidated_user_ids", set()).update(changed)
+        for user_id in changed:
+            invalidate_user(user_id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    # Again after commit, in case a concurrent request re-cached the old row in
+    # between, and in every other worker
+    changed = session.info.pop("invalidated_user_ids", None)
+    if changed:
+        invalidation_bus.publish("users", sorted(changed))
+
+invalidation_bus.on("users", lambda user_ids: [invalidate_user(i) for i in user_ids])
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
 ) -> User:
     """Get the current authenticated user from token"""
+    return await authenticate_token(token, db)
+
+async def authenticate_token(token: Optional[str], db: AsyncSession) -> User:
+    """Resolve a bearer token to an active user, from the principal cache when possible"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("sub")
-        token_type: str = payload.get("type")
-        if user_id is None or token_type != "access":
-            raise credentials_exception
-    except JWTError:
+    payload = decode_access_token(token) if token else None
+    if payload is None:
         raise credentials_exception
+    user_id = int(payload["sub"])
     
-    result = await db.execute(select(User).filter(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if user is None or not user.is_active:
-        raise credentials_exception
+    user = principal_cache.get(user_id)
+    if user is None:
+        result = await db.execute(select(User).filter(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if user is None or not user.is_active:
+            raise credentials_exception
+        user = snapshot_user(user)
+        principal_cache.set(user_id, user)
     return user
 
+async def get_stream_user(connection: HTTPConnection, token: Optional[str] = None) -> User:
+    """Authenticate a long-lived stream by bearer header or ``?token=``.
+    
+    Browsers can't set headers on EventSource or WebSocket connections. The
+    session is closed before streaming starts, so it doesn't hold a pooled
+    connection for the lifetime of the stream.
+    """
+    header = connection.headers.get("authorization", "")
+    if header.lower().startswith("bearer "):
+        token = header[7:]
+    async with AsyncSessionLocal() as db:
+        return await authenticate_token(token, db)
+
 async def require_admin(current_user: User = Depends(get_current_user)) -> User:
     """Require admin role"""
     if current_user.role != UserRole.ADMIN:
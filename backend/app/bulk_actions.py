@@ -0,0 +1,188 @@
+"""Set-based bulk checkout, checkin and status transitions"""
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, insert
+from typing import Iterable, List, Optional
+from collections import Counter
+from datetime import datetime
+from .models import Asset, AssetStatus, CheckoutHistory
+from .schemas import BulkActionResult, BulkConflict
+from .counters import adjust_asset_count
+from .audit_writer import record_audit_rows
+from .change_feed import asset_change, queue_asset_changes
+from .sync import take_change_seq
+
+def _request_meta(request: Optional[Request]) -> dict:
+    return {
+        "ip_address": request.client.host if request and request.client else None,
+        "user_agent": request.headers.get("user-agent") if request else None,
+    }
+
+async def _move_counts(db: AsyncSession, rows: Iterable, old_status: AssetStatus, new_status: AssetStatus):
+    for category, count in Counter(r.category for r in rows).items():
+        await adjust_asset_count(db, old_status, category, -count)
+        await adjust_asset_count(db, new_status, category, count)
+
+async def _report_conflicts(db: AsyncSession, asset_ids: List[int], done: set, reason) -> List[BulkConflict]:
+    """Explain, with one query, why each requested asset was not moved"""
+    missing = [i for i in dict.fromkeys(asset_ids) if i not in done]
+    if not missing:
+        return []
+    result = await db.execute(select(Asset.id, Asset.status).filter(Asset.id.in_(missing)))
+    statuses = dict(result.fetchall())
+    return [
+        BulkConflict(asset_id=i, error=reason(statuses[i]) if i in statuses else "Asset not found")
+        for i in missing
+    ]
+
+async def bulk_checkout(
+    db: AsyncSession, asset_ids: List[int], user_id: int, notes: Optional[str],
+    acting_user_id: int, request: Optional[Request] = None
+) -> BulkActionResult:
+    """Check out every AVAILABLE asset in ``asset_ids`` to ``user_id`` in one transaction"""
+    now = datetime.utcnow()
+    seq = await take_change_seq(db)
+    result = await db.execute(
+        update(Asset)
+        .where(Asset.id.in_(asset_ids), Asset.status == AssetStatus.AVAILABLE)
+        .values(status=AssetStatus.CHECKED_OUT, assigned_to=user_id, updated_at=now, change_seq=seq)
+        .returning(Asset.id, Asset.asset_tag, Asset.category)
+        .execution_options(synchronize_session=False)
+    )
+    moved = result.fetchall()
+    if moved:
+        await db.execute(insert(CheckoutHistory), [
+            {"asset_id": r.id, "user_id": user_id, "notes": notes,
+             "checked_out_by": acting_user_id, "checkout_date": now}
+            for r in moved
+        ])
+        meta = _request_meta(request)
+        audit_rows = [
+            {"action": "checkout", "entity_type": "asset", "entity_id": r.id,
+             "user_id": acting_user_id, "changes": {"user_id": user_id, "notes": notes, "bulk": True},
+             **meta}
+            for r in moved
+        ]
+        await record_audit_rows(db, audit_rows)
+        await _move_counts(db, moved, AssetStatus.AVAILABLE, AssetStatus.CHECKED_OUT)
+        queue_asset_changes(db, [
+            asset_change("updated", r.id, asset_tag=r.asset_tag, category=r.category,
+                         status=AssetStatus.CHECKED_OUT, assigned_to=user_id,
+                         previous={"category": r.category, "status": AssetStatus.AVAILABLE, "assigned_to": None})
+            for r in moved
+        ])
+    
+    done = {r.id for r in moved}
+    conflicts = await _report_conflicts(
+        db, asset_ids, done, lambda s: f"Asset is not available (status: {s.value})"
+    )
+    await db.commit()
+    return BulkActionResult(succeeded=sorted(done), conflicts=conflicts)
+
+async def bulk_checkin(
+    db: AsyncSession, asset_ids: List[int], notes: Optional[str],
+    acting_user_id: int, request: Optional[Request] = None
+) -> BulkActionResult:
+    """Check in every CHECKED_OUT asset in ``asset_ids`` in one transaction"""
+    now = datetime.utcnow()
+    seq = await take_change_seq(db)
+    result = await db.execute(
+        update(Asset)
+        .where(Asset.id.in_(asset_ids), Asset.status == AssetStatus.CHECKED_OUT)
+        .values(status=AssetStatus.AVAILABLE, assigned_to=None, updated_at=now, change_seq=seq)
+        .returning(Asset.id, Asset.asset_tag, Asset.category)
+        .execution_options(synchronize_session=False)
+    )
+    moved = result.fetchall()
+    if moved:
+        # Closing the open history rows also tells us who each asset was with
+        history = await db.execute(
+            update(CheckoutHistory)
+            .where(
+                CheckoutHistory.asset_id.in_([r.id for r in moved]),
+                CheckoutHistory.checkin_date == None
+            )
+            .values(checkin_date=now, checked_in_by=acting_user_id)
+            .returning(CheckoutHistory.asset_id, CheckoutHistory.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        previous = dict(history.fetchall())
+        meta = _request_meta(request)
+        audit_rows = [
+            {"action": "checkin", "entity_type": "asset", "entity_id": r.id,
+             "user_id": acting_user_id,
+             "changes": {"previous_assignee": previous.get(r.id), "notes": notes, "bulk": True},
+             **meta}
+            for r in moved
+        ]
+        await record_audit_rows(db, audit_rows)
+        await _move_counts(db, moved, AssetStatus.CHECKED_OUT, AssetStatus.AVAILABLE)
+        queue_asset_changes(db, [
+            asset_change("updated", r.id, asset_tag=r.asset_tag, category=r.category,
+                         status=AssetStatus.AVAILABLE, assigned_to=None,
+                         previous={"category": r.category, "status": AssetStatus.CHECKED_OUT,
+                                   "assigned_to": previous.get(r.id)})
+            for r in moved
+        ])
+    
+    done = {r.id for r in moved}
+    conflicts = await _report_conflicts(db, asset_ids, done, lambda s: "Asset is not checked out")
+    await db.commit()
+    return BulkActionResult(succeeded=sorted(done), conflicts=conflicts)
+
+async def bulk_set_status(
+    db: AsyncSession, asset_ids: List[int], new_status: AssetStatus, notes: Optional[str],
+    acting_user_id: int, request: Optional[Request] = None
+) -> BulkActionResult:
+    """Move assets to ``new_status`` (not CHECKED_OUT) in one transaction.
+    
+    Checked-out assets are reported as conflicts; they must be checked in
+    first. One UPDATE runs per possible source status so counters and the
+    audit trail know where each asset came from.
+    """
+    now = datetime.utcnow()
+    seq = await take_change_seq(db)
+    meta = _request_meta(request)
+    done = set()
+    audit_rows = []
+    for old_status in AssetStatus:
+        if old_status in (new_status, AssetStatus.CHECKED_OUT):
+            continue
+        result = await db.execute(
+            update(Asset)
+            .where(Asset.id.in_(asset_ids), Asset.status == old_status)
+            .values(status=new_status, updated_at=now, change_seq=seq)
+            .returning(Asset.id, Asset.asset_tag, Asset.category, Asset.assigned_to)
+            .execution_options(synchronize_session=False)
+        )
+        moved = result.fetchall()
+        if not moved:
+            continue
+        await _move_counts(db, moved, old_status, new_status)
+        done.update(r.id for r in moved)
+        queue_asset_changes(db, [
+            asset_change("updated", r.id, asset_tag=r.asset_tag, category=r.category,
+                         status=new_status, assigned_to=r.assigned_to,
+                         previous={"category": r.category, "status": old_status,
+                                   "assigned_to": r.assigned_to})
+            for r in moved
+        ])
+        audit_rows.extend(
+            {"action": "update", "entity_type": "asset", "entity_id": r.id,
+             "user_id": acting_user_id,
+             "changes": {"old": {"status": old_status.value},
+                         "new": {"status": new_status.value}, "notes": notes, "bulk": True},
+             **meta}
+            for r in moved
+        )
+    if audit_rows:
+        await record_audit_rows(db, audit_rows)
+    
+    def reason(s: AssetStatus) -> str:
+        if s == AssetStatus.CHECKED_OUT:
+            return "Asset is checked out; check it in first"
+        return f"Asset is already {s.value}"
+    
+    conflicts = await _report_conflicts(db, asset_ids, done, reason)
+    await db.commit()
+    return BulkActionResult(succeeded=sorted(done), conflicts=conflicts)
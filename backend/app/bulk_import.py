@@ -0,0 +1,171 @@
+"""Bulk asset import with chunked, set-based inserts"""
+from fastapi import Request
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from collections import Counter
+import codecs
+import csv
+import json
+from .config import settings
+from .models import Asset
+from .schemas import AssetCreate, BulkImportResult, BulkRowError
+from .counters import adjust_asset_count
+from .audit_writer import record_audit_rows
+from .change_feed import asset_change, queue_asset_changes
+from .sync import take_change_seq
+from .qr_store import asset_qr_key
+
+_chunk_adapter = TypeAdapter(List[AssetCreate])
+
+# A parsed row is (row_number, fields) or (row_number, error message)
+ParsedRow = Tuple[int, Any]
+
+def iter_json_rows(rows: Iterable[Any]) -> Iterator[ParsedRow]:
+    for number, row in enumerate(rows, start=1):
+        yield number, row if isinstance(row, dict) else "Row must be a JSON object"
+
+def iter_jsonl_rows(stream) -> Iterator[ParsedRow]:
+    """Parse a JSON Lines upload lazily; blank lines are skipped"""
+    for number, line in enumerate(codecs.iterdecode(stream, "utf-8-sig"), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, f"Invalid JSON: {e}"
+            continue
+        yield number, row if isinstance(row, dict) else "Row must be a JSON object"
+
+def iter_csv_rows(stream) -> Iterator[ParsedRow]:
+    """Parse a CSV upload lazily; the header names AssetCreate fields"""
+    reader = csv.DictReader(codecs.iterdecode(stream, "utf-8-sig"))
+    for number, row in enumerate(reader, start=1):
+        fields = {k.strip(): (v if v != "" else None) for k, v in row.items() if k}
+        if fields.get("metadata"):
+            try:
+                fields["metadata"] = json.loads(fields["metadata"])
+            except ValueError:
+                yield number, "metadata must be a JSON object"
+                continue
+        yield number, fields
+
+def _chunks(rows: Iterator[ParsedRow], size: int) -> Iterator[List[ParsedRow]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _validate_chunk(rows: List[Tuple[int, dict]]) -> Tuple[List[Tuple[int, AssetCreate]], List[BulkRowError]]:
+    """Validate a whole chunk in one pydantic call, splitting out per-row errors"""
+    try:
+        models = _chunk_adapter.validate_python([fields for _, fields in rows])
+        return list(zip([n for n, _ in rows], models)), []
+    except ValidationError as e:
+        bad: Dict[int, List[str]] = {}
+        for err in e.errors():
+            index, field = err["loc"][0], ".".join(str(p) for p in err["loc"][1:])
+            bad.setdefault(index, []).append(f"{field}: {err['msg']}" if field else err["msg"])
+    errors = [BulkRowError(row=rows[i][0], error="; ".join(msgs)) for i, msgs in sorted(bad.items())]
+    good = [row for i, row in enumerate(rows) if i not in bad]
+    if not good:
+        return [], errors
+    models = _chunk_adapter.validate_python([fields for _, fields in good])
+    return list(zip([n for n, _ in good], models)), errors
+
+async def import_assets(
+    db: AsyncSession,
+    rows: Iterator[ParsedRow],
+    user_id: int,
+    make_tag: Callable[[], str],
+    request: Optional[Request] = None
+) -> BulkImportResult:
+    """Insert assets chunk by chunk, committing each chunk and reporting bad rows.
+    
+    Each chunk costs one validation pass, one query each for serial-number
+    and asset-tag collisions, one multi-row insert for assets, one for audit
+    entries, and one counter update per status/category pair.
+    """
+    result = BulkImportResult(created=0, errors=[])
+    ip_address = request.client.host if request and request.client else None
+    user_agent = request.headers.get("user-agent") if request else None
+    seen_serials, seen_tags = set(), set()
+    
+    for chunk in _chunks(rows, settings.IMPORT_CHUNK_SIZE):
+        parsed = []
+        for number, fields in chunk:
+            if isinstance(fields, str):
+                result.errors.append(BulkRowError(row=number, error=fields))
+            else:
+                parsed.append((number, fields))
+        valid, errors = _validate_chunk(parsed)
+        result.errors.extend(errors)
+    
+        candidates = []
+        for number, data in valid:
+            tag = data.asset_tag or make_tag()
+            if tag in seen_tags:
+                result.errors.append(BulkRowError(row=number, error=f"Duplicate asset tag {tag} in upload"))
+            elif data.serial_number and data.serial_number in seen_serials:
+                result.errors.append(BulkRowError(row=number, error="Duplicate serial number in upload"))
+            else:
+                seen_tags.add(tag)
+                if data.serial_number:
+                    seen_serials.add(data.serial_number)
+                candidates.append((number, tag, data))
+    
+        serials = [d.serial_number for _, _, d in candidates if d.serial_number]
+        taken_serials = set()
+        if serials:
+            existing = await db.execute(select(Asset.serial_number).filter(Asset.serial_number.in_(serials)))
+            taken_serials = set(existing.scalars().all())
+        existing = await db.execute(
+            select(Asset.asset_tag).filter(Asset.asset_tag.in_([t for _, t, _ in candidates]))
+        )
+        taken_tags = set(existing.scalars().all())
+    
+        values = []
+        for number, tag, data in candidates:
+            if tag in taken_tags:
+                result.errors.append(BulkRowError(row=number, error="Asset tag already exists"))
+            elif data.serial_number in taken_serials:
+                result.errors.append(BulkRowError(row=number, error="Serial number already exists"))
+            else:
+                values.append({"asset_tag": tag, "qr_key": asset_qr_key(tag), **data.model_dump(exclude={"asset_tag"})})
+        if not values:
+            continue
+        seq = await take_change_seq(db)
+        for row in values:
+            row["change_seq"] = seq
+    
+        inserted = await db.execute(
+            insert(Asset).returning(Asset.id, Asset.asset_tag, Asset.name, Asset.status, Asset.category),
+            values
+        )
+        inserted = inserted.fetchall()
+        audit_rows = [
+            {
+                "action": "create", "entity_type": "asset", "entity_id": row.id,
+                "user_id": user_id, "changes": {"asset_tag": row.asset_tag, "name": row.name, "bulk": True},
+                "ip_address": ip_address, "user_agent": user_agent
+            }
+            for row in inserted
+        ]
+        await record_audit_rows(db, audit_rows)
+        queue_asset_changes(db, [
+            asset_change("created", row.id, asset_tag=row.asset_tag, category=row.category,
+                         status=row.status, assigned_to=None)
+            for row in inserted
+        ])
+        for (asset_status, category), count in Counter((r.status, r.category) for r in inserted).items():
+            await adjust_asset_count(db, asset_status, category, count)
+        await db.commit()
+        result.created += len(inserted)
+    
+    result.errors.sort(key=lambda e: e.row)
+    return result
@@ -0,0 +1,169 @@
+"""Live asset change feed for Server-Sent Events and WebSocket subscribers.
+
+Committed asset changes are sent over the invalidation bus, so every worker
+sees changes made by every other worker. Each worker numbers them and feeds one
+broadcaster, which serializes each event once and hands it to the queues of
+the subscribers whose filters match. A ring buffer of recent events lets a
+client that reconnects with its last event id pick up where it left off.
+Event ids are ``<epoch>-<number>`` with an epoch unique to the worker process,
+so an id from another worker, or from before a restart, gets a reset instead of
+a replay of unrelated events.
+"""
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+import asyncio
+import json
+import uuid
+from .config import settings
+from .models import Asset
+from .shared_cache import invalidation_bus
+
+class FeedEvent(NamedTuple):
+    seq: int
+    id: str
+    change: dict
+    data: str
+
+def _value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _value(v) for k, v in value.items()}
+    return getattr(value, "value", value)
+
+def asset_change(action: str, asset_id: int, **state) -> dict:
+    """A change as published; ``previous`` holds status/assignee/category before it"""
+    state = {k: _value(v) for k, v in state.items()}
+    return {
+        "action": action,
+        "asset_id": asset_id,
+        "timestamp": datetime.utcnow().isoformat(),
+        **state,
+    }
+
+def queue_asset_changes(db: AsyncSession, changes: Iterable[dict]):
+    """Publish these changes once the session commits (for Core UPDATE/INSERT paths)"""
+    db.sync_session.info.setdefault("asset_changes", []).extend(changes)
+
+class Subscription:
+    def __init__(self, filters: Dict[str, set], queue_size: int):
+        self.filters = {k: v for k, v in filters.items() if v}
+        self.backlog: Optional[List[FeedEvent]] = []
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.overflowed = False
+    
+    def matches(self, change: dict) -> bool:
+        # An asset leaving a status or assignee is news to that status's or assignee's watchers
+        previous = change.get("previous") or {}
+        for field, wanted in self.filters.items():
+            if change.get(field) not in wanted and previous.get(field) not in wanted:
+                return False
+        return True
+
+class ChangeBroadcaster:
+    def __init__(self, buffer_size: int, queue_size: int):
+        self._events: deque = deque(maxlen=buffer_size)
+        self._queue_size = queue_size
+        self.epoch = uuid.uuid4().hex[:8]
+        self._last_id = 0
+        self._subscribers: set = set()
+        self.metrics = {"events": 0, "deliveries": 0, "overflows": 0}
+    
+    def publish(self, changes: List[dict]):
+        for change in changes:
+            self._last_id += 1
+            event_id = f"{self.epoch}-{self._last_id}"
+            change = {"id": event_id, **change}
+            feed_event = FeedEvent(self._last_id, event_id, change, json.dumps(change))
+            self._events.append(feed_event)
+            self.metrics["events"] += 1
+            for subscription in list(self._subscribers):
+                if not subscription.matches(change):
+                    continue
+                try:
+                    subscription.queue.put_nowait(feed_event)
+                    self.metrics["deliveries"] += 1
+                except asyncio.QueueFull:
+                    # A subscriber this far behind resumes from the ring buffer on reconnect
+                    subscription.overflowed = True
+                    self._subscribers.discard(subscription)
+                    self.metrics["overflows"] += 1
+    
+    def _replay(self, last_event_id: Optional[str]) -> Optional[List[FeedEvent]]:
+        """Events after ``last_event_id``, or None if some are gone or it isn't one of ours"""
+        if last_event_id is None:
+            return []
+        epoch, _, number = last_event_id.rpartition("-")
+        if epoch != self.epoch or not number.isdigit():
+            return None
+        last_seq = int(number)
+        if last_seq > self._last_id:
+            return None
+        oldest = self._events[0].seq if self._events else self._last_id + 1
+        if last_seq < oldest - 1:
+            return None
+        return [e for e in self._events if e.seq > last_seq]
+    
+    def subscribe(self, filters: Dict[str, set], last_event_id: Optional[str] = None) -> Subscription:
+        """Register a subscriber; ``backlog`` is None when the client must refetch everything"""
+        subscription = Subscription(filters, self._queue_size)
+        backlog = self._replay(last_event_id)
+        subscription.backlog = None if backlog is None else [e for e in backlog if subscription.matches(e.change)]
+        self._subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+    
+    def snapshot(self) -> dict:
+        return {"subscribers": len(self._subscribers), "last_event_id": f"{self.epoch}-{self._last_id}", **self.metrics}
+
+change_feed = ChangeBroadcaster(settings.CHANGE_FEED_BUFFER, settings.CHANGE_FEED_QUEUE_SIZE)
+invalidation_bus.on("asset-changes", change_feed.publish)
+
+async def iter_events(subscription: Subscription):
+    """Yield the backlog, then live events; None every keepalive interval; stop on overflow"""
+    for feed_event in subscription.backlog or []:
+        yield feed_event
+    while not (subscription.overflowed and subscription.queue.empty()):
+        try:
+            yield await asyncio.wait_for(subscription.queue.get(), timeout=settings.CHANGE_FEED_KEEPALIVE)
+        except asyncio.TimeoutError:
+            yield None
+
+def _state(obj: Asset, previous: bool = False) -> dict:
+    state = {}
+    for field in ("category", "status", "assigned_to"):
+        value = getattr(obj, field)
+        if previous:
+            history = inspect(obj).attrs[field].history
+            value = history.deleted[0] if history.deleted else value
+        state[field] = _value(value)
+    return state
+
+@event.listens_for(Session, "after_flush")
+def _collect_asset_changes(session, flush_context):
+    changes = session.info.setdefault("asset_changes", [])
+    for obj in session.new:
+        if isinstance(obj, Asset):
+            changes.append(asset_change("created", obj.id, asset_tag=obj.asset_tag, **_state(obj)))
+    for obj in session.dirty:
+        if isinstance(obj, Asset) and session.is_modified(obj):
+            changes.append(asset_change(
+                "updated", obj.id, asset_tag=obj.asset_tag, previous=_state(obj, previous=True), **_state(obj)
+            ))
+    for obj in session.deleted:
+        if isinstance(obj, Asset):
+            changes.append(asset_change("deleted", obj.id, asset_tag=obj.asset_tag, **_state(obj)))
+
+@event.listens_for(Session, "after_commit")
+def _publish_asset_changes(session):
+    changes = session.info.pop("asset_changes", None)
+    if changes:
+        invalidation_bus.publish("asset-changes", changes)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_asset_changes(session):
+    session.info.pop("asset_changes", None)
@@ -6,12 +6,29 @@ import os
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./assets.db")
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # asyncpg prepared statements per connection
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # PostgreSQL statement_timeout, 0 disables
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    DATABASE_REPLICA_URLS: List[str] = []  # read-only endpoints are spread over these
+    REPLICA_HEALTH_INTERVAL: float = 10
+    REPLICA_MAX_LAG_SECONDS: float = 10
+    READ_YOUR_WRITES_SECONDS: float = 5  # a client reads from the primary this long after writing
     
     # JWT Auth
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    AUTH_CACHE_TTL: int = 30
+    AUTH_CACHE_SIZE: int = 10000
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 200
     
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173"]
@@ -20,6 +37,53 @@ class Settings(BaseSettings):
     AI_API_URL: str = os.getenv("AI_API_URL", "http://localhost:11434/v1")
     AI_MODEL: str = os.getenv("AI_MODEL", "qwen2.5:3b")
     AI_API_KEY: str = os.getenv("AI_API_KEY", "ollama")
+    AI_MAX_CONNECTIONS: int = 20
+    AI_CACHE_TTL: int = 3600
+    LOCAL_PARSER_MAX_KEYWORDS: int = 2
+    LOCAL_PARSER_VOCAB_TTL: int = 300
+    
+    # Audit pipeline: "sync" writes in the request transaction, "buffered" batches in the background
+    AUDIT_MODE: str = os.getenv("AUDIT_MODE", "sync")
+    AUDIT_FLUSH_INTERVAL: float = 1.0
+    AUDIT_FLUSH_SIZE: int = 500
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_SPOOL_PATH: str = os.getenv("AUDIT_SPOOL_PATH", "./audit_spool")
+    AUDIT_SPOOL_FSYNC: bool = False
+    
+    # Audit retention: months older than AUDIT_RETENTION_MONTHS are archived (0 keeps everything)
+    AUDIT_RETENTION_MONTHS: int = 0
+    AUDIT_ARCHIVE_DIR: str = os.getenv("AUDIT_ARCHIVE_DIR", "./audit_archive")
+    AUDIT_PARTITION_PREMAKE: int = 3
+    AUDIT_MAINTENANCE_INTERVAL: int = 86400
+    
+    # Shared cache: "memory" (per worker) or "redis" (any Redis-protocol server, shared by workers)
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_URL: str = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+    CACHE_PREFIX: str = "asset-tracker:"
+    CACHE_MEMORY_SIZE: int = 10000
+    CACHE_DEFAULT_TTL: int = 300
+    CHANGE_FEED_BUFFER: int = 1000  # recent events kept for Last-Event-ID resume
+    CHANGE_FEED_QUEUE_SIZE: int = 100  # per subscriber; a slower one is disconnected
+    CHANGE_FEED_KEEPALIVE: float = 15
+    DASHBOARD_CACHE_TTL: int = 30
+    
+    # Asset read cache (serialized responses + ETags)
+    READ_CACHE_SIZE: int = 5000
+    READ_CACHE_TTL: int = 300
+    
+    # Delta sync
+    SYNC_PAGE_SIZE: int = 500
+    SYNC_TOMBSTONE_DAYS: int = 90  # tokens older than the pruned tombstones need a full resync
+    
+    # Bulk operations
+    IMPORT_CHUNK_SIZE: int = 1000
+    
+    # QR codes
+    QR_CACHE_SIZE: int = 1024
+    QR_CACHE_MAX_AGE: int = 86400
+    QR_RENDER_WORKERS: int = 2
+    QR_RENDER_CONCURRENCY: int = 8
+    QR_SHEET_MAX_LABELS: int = 2000
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,102 @@
+"""Incrementally maintained asset counters for the dashboard"""
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
+from sqlalchemy import select, update, insert, func, text
+from sqlalchemy.dialects import postgresql, sqlite
+import asyncio
+from .models import Asset, AssetCounter, AssetStatus, AssetCategory
+
+async def adjust_asset_count(
+    db: AsyncSession,
+    status: AssetStatus,
+    category: AssetCategory,
+    delta: int
+):
+    """Apply a delta to one status/category counter inside the caller's transaction"""
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        # A single upsert, so two first writes to the same counter can't both insert
+        upsert = (postgresql if dialect == "postgresql" else sqlite).insert(AssetCounter.__table__)
+        upsert = upsert.values(status=status, category=category, count=max(delta, 0)).on_conflict_do_update(
+            index_elements=["status", "category"],
+            set_={"count": AssetCounter.__table__.c.count + delta}
+        )
+        await db.execute(upsert)
+        return
+    result = await db.execute(
+        update(AssetCounter)
+        .filter(AssetCounter.status == status, AssetCounter.category == category)
+        .values(count=AssetCounter.count + delta)
+    )
+    if result.rowcount == 0:
+        db.add(AssetCounter(status=status, category=category, count=max(delta, 0)))
+
+async def move_asset_count(
+    db: AsyncSession,
+    old_status: Optional[AssetStatus],
+    old_category: Optional[AssetCategory],
+    new_status: Optional[AssetStatus],
+    new_category: Optional[AssetCategory]
+):
+    """Move one asset between counters; either side may be None for create/delete"""
+    if (old_status, old_category) == (new_status, new_category):
+        return
+    if old_status is not None and old_category is not None:
+        await adjust_asset_count(db, old_status, old_category, -1)
+    if new_status is not None and new_category is not None:
+        await adjust_asset_count(db, new_status, new_category, 1)
+
+async def _count_assets(conn: AsyncConnection) -> list:
+    result = await conn.execute(
+        select(Asset.status, Asset.category, func.count(Asset.id))
+        .group_by(Asset.status, Asset.category)
+    )
+    counts = {(s, c): n for s, c, n in result.fetchall()}
+    return [
+        {"status": s, "category": c, "count": counts.get((s, c), 0)}
+        for s in AssetStatus for c in AssetCategory
+    ]
+
+async def seed_asset_counters(conn: AsyncConnection):
+    """Fill the counters from the assets table if they are empty; run at startup.
+    
+    Once seeded, counters are only ever adjusted, so a worker starting while
+    others write doesn't overwrite their deltas. Workers starting together
+    insert the same rows and the loser's are ignored.
+    """
+    if (await conn.execute(select(AssetCounter.status).limit(1))).first() is not None:
+        return
+    rows = await _count_assets(conn)
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(AssetCounter.__table__)
+        await conn.execute(stmt.on_conflict_do_nothing(index_elements=["status", "category"]), rows)
+    else:
+        await conn.execute(insert(AssetCounter), rows)
+
+async def rebuild_asset_counters(conn: AsyncConnection):
+    """Recompute every counter from the assets table with one grouped aggregate.
+    
+    For rows written outside the API (seed data, manual SQL); run with
+    ``python -m app.counters``. On PostgreSQL asset writes wait for it, so no
+    delta lands between the count and the overwrite.
+    """
+    if conn.dialect.name == "postgresql":
+        await conn.execute(text("LOCK TABLE assets IN SHARE MODE"))
+    for row in await _count_assets(conn):
+        result = await conn.execute(
+            update(AssetCounter)
+            .filter(AssetCounter.status == row["status"], AssetCounter.category == row["category"])
+            .values(count=row["count"])
+        )
+        if result.rowcount == 0:
+            await conn.execute(insert(AssetCounter), [row])
+
+async def _main():
+    from .database import engine
+    async with engine.begin() as conn:
+        await rebuild_asset_counters(conn)
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -1,13 +1,124 @@
 "Database configuration with async SQLAlchemy"
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
+from fastapi import Request
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy import event, make_url, text
+from typing import List, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
+import logging
+import time
+from .cache import TTLCache
 from .config import settings
+from .shared_cache import invalidation_bus
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=False,
-    future=True
-)
+logger = logging.getLogger(__name__)
+
+class PoolMetrics:
+    """How long requests wait to check a connection out of the pool"""
+    
+    BUCKETS_MS = (1, 10, 100, 1000)
+    
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.histogram = [0] * (len(self.BUCKETS_MS) + 1)
+    
+    def record(self, seconds: float):
+        self.checkouts += 1
+        self.wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+        ms = seconds * 1000
+        index = next((i for i, bound in enumerate(self.BUCKETS_MS) if ms < bound), len(self.BUCKETS_MS))
+        self.histogram[index] += 1
+    
+    def snapshot(self) -> dict:
+        pool = engine.pool
+        labels = [f"<{b}ms" for b in self.BUCKETS_MS] + [f">={self.BUCKETS_MS[-1]}ms"]
+        return {
+            "dialect": engine.dialect.name,
+            "pool": pool.status(),
+            "size": getattr(pool, "size", lambda: None)(),
+            "checked_out": getattr(pool, "checkedout", lambda: None)(),
+            "overflow": getattr(pool, "overflow", lambda: None)(),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            "wait_histogram": dict(zip(labels, self.histogram)),
+        }
+
+pool_metrics = PoolMetrics()
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records checkout wait time (including any new connect)"""
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except Exception:
+            pool_metrics.timeouts += 1
+            raise
+        pool_metrics.record(time.perf_counter() - started)
+        return entry
+
+def engine_options(url_string: str) -> dict:
+    """Pool, driver and timeout options for ``create_async_engine`` from Settings"""
+    url = make_url(url_string)
+    options = {"echo": False}
+    connect_args = {}
+    if url.get_backend_name() == "sqlite":
+        connect_args["timeout"] = settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+        if url.database in (None, "", ":memory:"):
+            return {**options, "connect_args": connect_args}
+    elif url.get_driver_name() == "asyncpg":
+        url = url.update_query_dict({
+            "prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)
+        })
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            connect_args["server_settings"] = {
+                "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)
+            }
+    return {
+        **options,
+        "url": url,
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+def make_engine(url: str) -> AsyncEngine:
+    options = engine_options(url)
+    return create_async_engine(options.pop("url", url), **options)
+
+engine = make_engine(settings.DATABASE_URL)
+
+if engine.dialect.name == "sqlite":
+    logger.warning(
+        "Using SQLite: writes are serialized to a single writer. "
+        "Set DATABASE_URL to a PostgreSQL URL for multi-user deployments."
+    )
+    
+    @event.listens_for(engine.sync_engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers run alongside the writer; busy_timeout waits instead of failing"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -18,15 +129,194 @@ AsyncSessionLocal = async_sessionmaker(
 class Base(DeclarativeBase):
     pass
 
-async def get_db():
+def client_key(request: Request) -> str:
+    """Who made the request, for read-your-writes: their token, else their address"""
+    identity = request.headers.get("authorization") or (request.client.host if request.client else "")
+    return hashlib.sha256(identity.encode()).hexdigest()[:32]
+
+@event.listens_for(Session, "after_flush")
+def _note_writes(session, flush_context):
+    session.info["has_writes"] = True
+
+async def get_db(request: Request):
     "Dependency for getting database session"
     async with AsyncSessionLocal() as session:
         try:
             yield session
             await session.commit()
+            if session.info.get("has_writes"):
+                replicas.note_write(client_key(request))
         except Exception:
             await session.rollback()
             raise
         finally:
             await session.close()
+
+class ReplicaRouter:
+    """Spread read-only sessions over healthy replicas, round-robin.
+    
+    A replica is taken out of rotation when its health check fails or it
+    lags more than ``REPLICA_MAX_LAG_SECONDS``; with none healthy, reads go
+    to the primary. A client that just committed a write reads from the
+    primary for ``READ_YOUR_WRITES_SECONDS`` so it sees its own change.
+    """
+    
+    def __init__(self, urls: List[str]):
+        self.urls = urls
+        self.engines = [make_engine(url) for url in urls]
+        self.sessionmakers = [
+            async_sessionmaker(e, class_=AsyncSession, expire_on_commit=False, info={"replica": True})
+            for e in self.engines
+        ]
+        self.healthy = [True] * len(urls)
+        self.lag_seconds: List[Optional[float]] = [None] * len(urls)
+        self._next = 0
+        self._recent_writers = TTLCache(100000, settings.READ_YOUR_WRITES_SECONDS)
+        self._checker: Optional[asyncio.Task] = None
+        self.metrics = {"replica_reads": 0, "primary_reads": 0, "sticky_reads": 0, "failovers": 0}
+    
+    def note_write(self, key: str):
+        """Pin this client to the primary in every worker for a short window"""
+        invalidation_bus.publish("writers", [key])
+    
+    def _pin(self, keys: List[str]):
+        for key in keys:
+            self._recent_writers.set(key, True)
+    
+    def pick(self, key: str) -> Optional[int]:
+        """Index of the replica to read from, or None for the primary"""
+        if self._recent_writers.get(key):
+            self.metrics["sticky_reads"] += 1
+            return None
+        for _ in range(len(self.engines)):
+            index = self._next % len(self.engines)
+            self._next += 1
+            if self.healthy[index]:
+                self.metrics["replica_reads"] += 1
+                return index
+        self.metrics["primary_reads"] += 1
+        return None
+    
+    def mark_down(self, index: int, reason: str):
+        if self.healthy[index]:
+            logger.warning(f"Read replica {index} out of rotation: {reason}")
+            self.metrics["failovers"] += 1
+        self.healthy[index] = False
+    
+    async def _lag(self, replica: AsyncEngine) -> float:
+        async with replica.connect() as conn:
+            if conn.dialect.name != "postgresql":
+                await conn.execute(text("SELECT 1"))
+                return 0.0
+            # NULL on a primary or a replica that has replayed nothing yet
+            lag = (await conn.execute(text(
+                "SELECT CASE WHEN pg_is_in_recovery() "
+                "THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+            ))).scalar()
+            return float(lag or 0.0)
+    
+    async def check(self):
+        for index, replica in enumerate(self.engines):
+            try:
+                lag = await asyncio.wait_for(self._lag(replica), timeout=5)
+            except Exception as e:
+                self.lag_seconds[index] = None
+                self.mark_down(index, str(e) or type(e).__name__)
+                continue
+            self.lag_seconds[index] = lag
+            if lag > settings.REPLICA_MAX_LAG_SECONDS:
+                self.mark_down(index, f"{lag:.1f}s behind")
+            elif not self.healthy[index]:
+                logger.info(f"Read replica {index} back in rotation")
+                self.healthy[index] = True
+    
+    async def _check_forever(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(settings.REPLICA_HEALTH_INTERVAL)
+    
+    async def start(self):
+        if self.engines and self._checker is None:
+            self._checker = asyncio.create_task(self._check_forever())
+    
+    async def stop(self):
+        if self._checker is not None:
+            self._checker.cancel()
+            try:
+                await self._checker
+            except asyncio.CancelledError:
+                pass
+            self._checker = None
+        for replica in self.engines:
+            await replica.dispose()
+    
+    def snapshot(self) -> dict:
+        return {
+            "replicas": [
+                {"url": make_url(url).render_as_string(hide_password=True), "healthy": ok, "lag_seconds": lag}
+                for url, ok, lag in zip(self.urls, self.healthy, self.lag_seconds)
+            ],
+            **self.metrics,
+        }
+
+replicas = ReplicaRouter(settings.DATABASE_REPLICA_URLS)
+invalidation_bus.on("writers", replicas._pin)
+
+def is_replica(session: AsyncSession) -> bool:
+    return bool(session.info.get("replica"))
+
+def is_connection_error(error: BaseException) -> bool:
+    """True if the database could not be reached, as opposed to a statement failing"""
+    if isinstance(error, OSError):
+        return True
+    if isinstance(error, DBAPIError):
+        # Connect failures carry no statement
+        return error.connection_invalidated or (isinstance(error, OperationalError) and error.statement is None)
+    return False
+
+async def get_read_db(request: Request):
+    """Dependency for read-only endpoints: a replica session when one is healthy.
+    
+    Nothing is committed; handlers using it must not write.
+    """
+    index = replicas.pick(client_key(request))
+    if index is None:
+        async with AsyncSessionLocal() as session:
+            try:
+                yield session
+            finally:
+                await session.rollback()
+        return
+    async with replicas.sessionmakers[index]() as session:
+        try:
+            yield session
+        except (DBAPIError, OSError) as e:
+            # A timeout or a failing statement says nothing about the replica's health
+            if is_connection_error(e):
+                replicas.mark_down(index, str(e))
+            raise
+        finally:
+            await session.rollback()
+
+@asynccontextmanager
+async def advisory_lock(name: str):
+    """Let one process across all workers run a block; yields whether this one got it.
+    
+    On PostgreSQL a session advisory lock keyed by ``name`` is tried (not waited
+    for) and held on its own connection until the block ends. Other databases
+    always yield True.
+    """
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+    key = int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+    async with engine.connect() as conn:
+        acquired = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})).scalar()
+        await conn.commit()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                await conn.commit()
 EOF
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""Streaming asset export (CSV, XLSX and Parquet)"""
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from openpyxl import Workbook
+from typing import AsyncIterator, Optional
+import tempfile
+import io
+import csv
+from .database import AsyncSessionLocal
+from .models import Asset, User, AssetStatus, AssetCategory
+
+EXPORT_HEADER = [
+    "Asset Tag", "Name", "Category", "Status", "Serial Number",
+    "Manufacturer", "Model", "Location", "Assigned To", "Created At"
+]
+EXPORT_CHUNK_SIZE = 1000
+XLSX_SPOOL_SIZE = 8 * 1024 * 1024
+# Repeated values (category, status, location, assignee) are dictionary encoded
+PARQUET_DICTIONARY_COLUMNS = {"category", "status", "location", "assignee"}
+PARQUET_COLUMNS = [
+    "asset_tag", "name", "category", "status", "serial_number",
+    "manufacturer", "model", "location", "assignee", "created_at"
+]
+
+async def iter_export_rows(
+    category: Optional[AssetCategory] = None,
+    status: Optional[AssetStatus] = None
+) -> AsyncIterator[list]:
+    """Yield export rows from a server-side cursor, EXPORT_CHUNK_SIZE at a time.
+
+    Opens its own session because the generator outlives the request's
+    ``get_db`` session once the response starts streaming.
+    """
+    query = (
+        select(
+            Asset.asset_tag, Asset.name, Asset.category, Asset.status,
+            Asset.serial_number, Asset.manufacturer, Asset.model,
+            Asset.location, User.full_name, Asset.created_at
+        )
+        .outerjoin(User, Asset.assigned_to == User.id)
+        .order_by(Asset.id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+    if category:
+        query = query.filter(Asset.category == category)
+    if status:
+        query = query.filter(Asset.status == status)
+    
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query)
+        async for partition in result.partitions():
+            for (tag, name, cat, stat, serial, manufacturer, model,
+                 location, assignee, created_at) in partition:
+                yield [
+                    tag, name, cat.value, stat.value, serial or "",
+                    manufacturer or "", model or "", location or "",
+                    assignee or "", created_at
+                ]
+
+async def stream_csv(rows: AsyncIterator[list]) -> AsyncIterator[str]:
+    """Encode rows as CSV, flushing one chunk of text at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADER)
+    pending = 0
+    async for row in rows:
+        row[-1] = row[-1].isoformat() if row[-1] else ""
+        writer.writerow(row)
+        pending += 1
+        if pending >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+async def stream_xlsx(rows: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    """Build an XLSX with a write-only workbook and stream the finished file.
+
+    Write-only mode keeps rows on disk rather than in memory; the zip
+    container can only be emitted once every row is written, so bytes
+    start flowing after the last row instead of the first.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Assets")
+    sheet.append(EXPORT_HEADER)
+    async for row in rows:
+        sheet.append(row)
+    
+    with tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_SIZE) as output:
+        await run_in_threadpool(workbook.save, output)
+        output.seek(0)
+        while chunk := output.read(64 * 1024):
+            yield chunk
+
+async def stream_parquet(rows: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    """Write one Parquet row group per chunk and stream the finished file.
+
+    Like XLSX, the footer comes last, so bytes flow once every row group is
+    written; only one chunk of rows is held in memory at a time.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    schema = pa.schema([
+        (name, pa.timestamp("us") if name == "created_at"
+         else pa.dictionary(pa.int32(), pa.string()) if name in PARQUET_DICTIONARY_COLUMNS
+         else pa.string())
+        for name in PARQUET_COLUMNS
+    ])
+    
+    def write_chunk(writer, chunk: list):
+        columns = list(zip(*chunk))
+        arrays = [
+            pa.array(values, type=field.type.value_type).dictionary_encode()
+            if pa.types.is_dictionary(field.type) else pa.array(values, type=field.type)
+            for field, values in zip(schema, columns)
+        ]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    
+    with tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_SIZE) as output:
+        writer = pq.ParquetWriter(output, schema)
+        chunk = []
+        async for row in rows:
+            chunk.append(row)
+            if len(chunk) >= EXPORT_CHUNK_SIZE:
+                await run_in_threadpool(write_chunk, writer, chunk)
+                chunk = []
+        if chunk:
+            await run_in_threadpool(write_chunk, writer, chunk)
+        await run_in_threadpool(writer.close)
+        output.seek(0)
+        while chunk := output.read(64 * 1024):
+            yield chunk
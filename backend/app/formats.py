@@ -0,0 +1,193 @@
+"""Response formats and sparse fieldsets for bulk asset reads.
+
+Bulk reads skip the ORM and Pydantic. Assets come back as plain rows holding
+only the requested ``fields``, and their assignees, when included, come from
+one extra query. JSON keeps the usual
+``AssetResponse`` shape, encoded by orjson. MessagePack carries each assignee
+once, in a ``users`` side table that assets point into by ``assigned_to``.
+Arrow and Parquet are flat tables whose assignee columns are dictionary
+encoded, so each user's details are stored once per response.
+"""
+from fastapi import HTTPException, Request
+from sqlalchemy import select, Integer, BigInteger, Boolean, DateTime, Enum, JSON
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+import io
+import orjson
+from .models import Asset, User
+from .schemas import AssetResponse, UserResponse
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+FORMAT_PATTERN = "^(json|msgpack|arrow|parquet)$"
+_BY_MEDIA_TYPE = {media_type: fmt for fmt, media_type in MEDIA_TYPES.items()}
+_BY_MEDIA_TYPE["application/x-msgpack"] = "msgpack"
+
+ASSET_FIELDS = [f for f in AssetResponse.model_fields if f != "assignee"]
+USER_FIELDS = list(UserResponse.model_fields)
+# Columnar formats keep the assignee fields an analyst groups by
+ASSIGNEE_COLUMNS = ["username", "full_name", "email", "department", "role"]
+
+def negotiate(request: Request, fmt: Optional[str] = None) -> str:
+    """``?format=`` if given, else the best supported type in Accept (JSON by default)"""
+    if fmt:
+        return fmt
+    accept = request.headers.get("accept")
+    if not accept:
+        return "json"
+    ranges = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    pass
+        ranges.append((-quality, position, media_type.lower()))
+    for quality, _, media_type in sorted(ranges):
+        if quality == 0:
+            break
+        if media_type in _BY_MEDIA_TYPE:
+            return _BY_MEDIA_TYPE[media_type]
+        if media_type in ("*/*", "application/*"):
+            return "json"
+    raise HTTPException(status_code=406, detail=f"Supported types: {', '.join(MEDIA_TYPES.values())}")
+
+def parse_fieldset(fields: Optional[str], include: Optional[str]) -> Tuple[List[str], bool]:
+    """Columns to select and whether to load assignees, from ``fields=``/``include=``.
+    
+    Without either parameter a read returns every column and the assignee.
+    ``id`` is always selected, and so is ``assigned_to`` when assignees are included.
+    """
+    if include is None:
+        with_assignee = fields is None
+    else:
+        relations = {r.strip() for r in include.split(",") if r.strip()}
+        if relations - {"assignee"}:
+            raise HTTPException(status_code=400, detail=f"Unknown include: {', '.join(sorted(relations - {'assignee'}))}")
+        with_assignee = "assignee" in relations
+    if fields is None:
+        return list(ASSET_FIELDS), with_assignee
+    wanted = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = wanted - set(ASSET_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    wanted.add("id")
+    if with_assignee:
+        wanted.add("assigned_to")
+    return [f for f in ASSET_FIELDS if f in wanted], with_assignee
+
+def asset_row_query(fields: List[str] = ASSET_FIELDS) -> Select:
+    """SELECT of just these AssetResponse columns, as rows rather than ORM objects"""
+    return select(*[Asset.__table__.c[f] for f in fields])
+
+async def fetch_asset_rows(db: AsyncSession, query: Select,
+                           with_assignee: bool = True) -> Tuple[List[dict], Optional[Dict[int, dict]]]:
+    """Run an ``asset_row_query`` and load each distinct assignee once (users is None if not included)"""
+    rows = [dict(r._mapping) for r in (await db.execute(query)).fetchall()]
+    if not with_assignee:
+        return rows, None
+    user_ids = {r["assigned_to"] for r in rows if r["assigned_to"] is not None}
+    users = {}
+    if user_ids:
+        result = await db.execute(
+            select(*[User.__table__.c[f] for f in USER_FIELDS]).filter(User.id.in_(user_ids))
+        )
+        users = {u.id: dict(u._mapping) for u in result.fetchall()}
+    return rows, users
+
+def require(module: str):
+    """Import an optional serializer, or answer 406 if it isn't installed"""
+    try:
+        return __import__(module, fromlist=["_"])
+    except ImportError:
+        raise HTTPException(status_code=406, detail=f"This server can't produce that format ({module} is not installed)")
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return getattr(value, "value", value)
+
+def asset_items(rows: List[dict], users: Optional[Dict[int, dict]]) -> List[dict]:
+    """Rows as AssetResponse-shaped dicts (same key order), with ``assignee`` nested if loaded"""
+    if not rows:
+        return []
+    keys = [f for f in AssetResponse.model_fields if f in rows[0] or (f == "assignee" and users is not None)]
+    return [
+        {f: row[f] if f != "assignee" else users.get(row["assigned_to"]) for f in keys}
+        for row in rows
+    ]
+
+def _json(rows: List[dict], users: Optional[Dict[int, dict]], paged: bool, next_cursor: Optional[str]) -> bytes:
+    items = asset_items(rows, users)
+    return orjson.dumps({"items": items, "next_cursor": next_cursor} if paged else items)
+
+def _msgpack(rows: List[dict], users: Optional[Dict[int, dict]], next_cursor: Optional[str]) -> bytes:
+    msgpack = require("msgpack")
+    body = {"items": rows, "next_cursor": next_cursor}
+    if users is not None:
+        body["users"] = list(users.values())
+    return msgpack.packb(body, default=_plain)
+
+def _arrow_type(pa, column):
+    if isinstance(column.type, (Integer, BigInteger)):
+        return pa.int64()
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column.type, Enum):
+        return pa.dictionary(pa.int8(), pa.string())
+    return pa.string()
+
+def _arrow_table(rows: List[dict], users: Optional[Dict[int, dict]], names: List[str], next_cursor: Optional[str]):
+    pa = require("pyarrow")
+    columns, fields = [], []
+    for name in names:
+        column = Asset.__table__.c[name]
+        arrow_type = _arrow_type(pa, column)
+        values = [row[name] for row in rows]
+        if isinstance(column.type, JSON):
+            values = [orjson.dumps(v).decode() if v is not None else None for v in values]
+        elif isinstance(column.type, Enum):
+            values = [_plain(v) for v in values]
+        array = pa.array(values, type=arrow_type.value_type if pa.types.is_dictionary(arrow_type) else arrow_type)
+        columns.append(array.dictionary_encode() if pa.types.is_dictionary(arrow_type) else array)
+        fields.append(pa.field(name, columns[-1].type))
+    
+    if users is not None:
+        # One dictionary entry per distinct assignee; each row stores only an index
+        order = {user_id: i for i, user_id in enumerate(users)}
+        indices = pa.array([order.get(row["assigned_to"]) for row in rows], type=pa.int32())
+        for name in ASSIGNEE_COLUMNS:
+            dictionary = pa.array([_plain(u[name]) for u in users.values()], type=pa.string())
+            columns.append(pa.DictionaryArray.from_arrays(indices, dictionary))
+            fields.append(pa.field(f"assignee_{name}", columns[-1].type))
+    
+    metadata = {b"next_cursor": next_cursor.encode()} if next_cursor else None
+    return pa.Table.from_arrays(columns, schema=pa.schema(fields, metadata=metadata))
+
+def render(fmt: str, rows: List[dict], users: Optional[Dict[int, dict]], fields: List[str] = ASSET_FIELDS,
+           paged: bool = False, next_cursor: Optional[str] = None) -> bytes:
+    """Encode asset rows in ``fmt``; pages carry ``next_cursor`` (schema metadata for Arrow/Parquet)"""
+    if fmt == "json":
+        return _json(rows, users, paged, next_cursor)
+    if fmt == "msgpack":
+        return _msgpack(rows, users, next_cursor)
+    table = _arrow_table(rows, users, fields, next_cursor)
+    sink = io.BytesIO()
+    if fmt == "arrow":
+        pa = require("pyarrow")
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        require("pyarrow.parquet").write_table(table, sink)
+    return sink.getvalue()
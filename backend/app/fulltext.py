@@ -0,0 +1,102 @@
+"""Full-text search index over assets.
+
+SQLite gets an external-content FTS5 table kept in sync by triggers;
+PostgreSQL gets a generated ``tsvector`` column with a GIN index. Any
+other backend falls back to the old ``ILIKE`` scan.
+"""
+from sqlalchemy import text, or_, literal_column, func, table, column
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql import Select
+from typing import List
+import logging
+import re
+from .models import Asset
+
+logger = logging.getLogger(__name__)
+
+SEARCH_COLUMNS = ["name", "description", "asset_tag", "serial_number", "manufacturer"]
+
+_SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS assets_fts USING fts5(
+        {", ".join(SEARCH_COLUMNS)}, content='assets', content_rowid='id'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS assets_fts_ai AFTER INSERT ON assets BEGIN
+        INSERT INTO assets_fts(rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES (new.id, {", ".join("new." + c for c in SEARCH_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS assets_fts_ad AFTER DELETE ON assets BEGIN
+        INSERT INTO assets_fts(assets_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {", ".join("old." + c for c in SEARCH_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS assets_fts_au AFTER UPDATE ON assets BEGIN
+        INSERT INTO assets_fts(assets_fts, rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES ('delete', old.id, {", ".join("old." + c for c in SEARCH_COLUMNS)});
+        INSERT INTO assets_fts(rowid, {", ".join(SEARCH_COLUMNS)})
+        VALUES (new.id, {", ".join("new." + c for c in SEARCH_COLUMNS)});
+    END""",
+]
+
+_TSVECTOR_SOURCE = " || ' ' || ".join(f"coalesce({c}, '')" for c in SEARCH_COLUMNS)
+
+_POSTGRES_DDL = [
+    f"""ALTER TABLE assets ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', {_TSVECTOR_SOURCE})) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_assets_search_vector ON assets USING GIN (search_vector)",
+]
+
+assets_fts = table("assets_fts", column("rowid"), column("rank"))
+
+_fts_dialect = None
+
+def tokenize(query: str) -> List[str]:
+    """Split a query into index terms the same way the tokenizers do"""
+    return [t.lower() for t in re.findall(r"\w+", query)]
+
+async def ensure_search_index(conn: AsyncConnection):
+    """Create (and on first creation, populate) the full-text index"""
+    global _fts_dialect
+    dialect = conn.dialect.name
+    try:
+        if dialect == "sqlite":
+            exists = await conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = 'assets_fts'")
+            )
+            created = exists.scalar() is None
+            for ddl in _SQLITE_DDL:
+                await conn.execute(text(ddl))
+            if created:
+                await conn.execute(text("INSERT INTO assets_fts(assets_fts) VALUES ('rebuild')"))
+        elif dialect == "postgresql":
+            for ddl in _POSTGRES_DDL:
+                await conn.execute(text(ddl))
+        else:
+            logger.info(f"No full-text index for dialect {dialect}, using ILIKE search")
+            return
+    except Exception as e:
+        logger.warning(f"Full-text index unavailable, using ILIKE search: {e}")
+        return
+    _fts_dialect = dialect
+
+def apply_text_search(query: Select, terms: List[str], dialect: str) -> Select:
+    """Restrict an Asset select to rows matching every term (prefix match), best first"""
+    if not terms:
+        return query
+    if _fts_dialect == "sqlite" and dialect == "sqlite":
+        match = " AND ".join(f'"{t}"*' for t in terms)
+        return (
+            query.join(assets_fts, assets_fts.c.rowid == Asset.id)
+            .filter(literal_column("assets_fts").op("MATCH")(match))
+            .order_by(assets_fts.c.rank)
+        )
+    if _fts_dialect == "postgresql" and dialect == "postgresql":
+        tsquery = func.to_tsquery("simple", " & ".join(f"{t}:*" for t in terms))
+        vector = literal_column("assets.search_vector")
+        return (
+            query.filter(vector.op("@@")(tsquery))
+            .order_by(func.ts_rank(vector, tsquery).desc())
+        )
+    for term in terms:
+        query = query.filter(or_(*[
+            getattr(Asset, c).ilike(f"%{term}%") for c in SEARCH_COLUMNS
+        ]))
+    return query
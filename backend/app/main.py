@@ -1,9 +1,19 @@
 """FastAPI application entry point"""
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import logging
 from .config import settings
-from .database import engine, Base
+from .database import engine, Base, pool_metrics, replicas
+from .counters import seed_asset_counters
+from .sync import ensure_change_sequence
+from .fulltext import ensure_search_index
+from .qr_render import shutdown_render_pool
+from .routers.search import start_ai_client, close_ai_client
+from .auth import shutdown_hash_pool, require_admin
+from .audit_writer import audit_writer
+from .shared_cache import invalidation_bus
+from .audit_partitions import ensure_partitions, run_maintenance_loop
 from .routers import users, assets, audit, search, qr
 
 logging.basicConfig(level=logging.INFO)
@@ -28,6 +38,30 @@ async def startup():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     logger.info("Database tables created")
+    async with engine.begin() as conn:
+        await ensure_change_sequence(conn)
+    async with engine.begin() as conn:
+        await seed_asset_counters(conn)
+    async with engine.begin() as conn:
+        await ensure_search_index(conn)
+    async with engine.begin() as conn:
+        await ensure_partitions(conn)
+    app.state.audit_maintenance = asyncio.create_task(run_maintenance_loop())
+    await start_ai_client()
+    await invalidation_bus.start()
+    await replicas.start()
+    if settings.AUDIT_MODE == "buffered":
+        await audit_writer.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.audit_maintenance.cancel()
+    await audit_writer.stop()
+    shutdown_render_pool()
+    shutdown_hash_pool()
+    await close_ai_client()
+    await replicas.stop()
+    await invalidation_bus.stop()
 
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(assets.router, prefix="/api/assets", tags=["assets"])
@@ -38,3 +72,8 @@ app.include_router(qr.router, prefix="/api/qr", tags=["qr"])
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
+
+@app.get("/api/db-metrics")
+async def get_db_metrics(current_user=Depends(require_admin)):
+    """Connection pool occupancy, checkout wait times and read replica health (admin only)"""
+    return {**pool_metrics.snapshot(), "read_routing": replicas.snapshot()}
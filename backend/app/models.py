@@ -1,5 +1,5 @@
 "SQLAlchemy models for Asset Inventory Tracker"
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Enum, Boolean, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, ForeignKey, Enum, Boolean, JSON, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -48,6 +48,12 @@ class User(Base):
 
 class Asset(Base):
     __tablename__ = assets
+    __table_args__ = (
+        Index("ix_assets_status_category", "status", "category"),
+        Index("ix_assets_category", "category"),
+        Index("ix_assets_assigned_to_status", "assigned_to", "status"),
+        Index("ix_assets_change_seq", "change_seq", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     asset_tag = Column(String(50), unique=True, index=True, nullable=False)
@@ -65,9 +71,10 @@ class Asset(Base):
     assigned_to = Column(Integer, ForeignKey(users.id), nullable=True)
     notes = Column(Text)
     metadata = Column(JSON, default=dict)
-    qr_code = Column(String(500))
+    qr_key = Column(String(64))  # Rendered PNG lives in qr_images under this key
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    change_seq = Column(BigInteger, nullable=False, default=0)  # Set on every write by app.sync
     
     # Relationships
     assignee = relationship(User, back_populates=assigned_assets, foreign_keys=[assigned_to])
@@ -76,6 +83,9 @@ class Asset(Base):
 
 class CheckoutHistory(Base):
     __tablename__ = checkout_history
+    __table_args__ = (
+        Index("ix_checkout_history_asset_checkin", "asset_id", "checkin_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     asset_id = Column(Integer, ForeignKey(assets.id), nullable=False)
@@ -92,6 +102,10 @@ class CheckoutHistory(Base):
 
 class AuditLog(Base):
     __tablename__ = audit_logs
+    __table_args__ = (
+        Index("ix_audit_logs_entity", "entity_type", "entity_id", "timestamp"),
+        Index("ix_audit_logs_user_timestamp", "user_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     action = Column(String(50), nullable=False)  # create, update, delete, checkout, checkin
@@ -101,7 +115,7 @@ class AuditLog(Base):
     changes = Column(JSON, default=dict)  # What was changed
     ip_address = Column(String(50))
     user_agent = Column(String(500))
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
     
     # Relationships
     user = relationship(User, back_populates=audit_logs)
@@ -123,4 +137,46 @@ class SoftwareLicense(Base):
     notes = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class AssetCounter(Base):
+    __tablename__ = "asset_counters"
+
+    status = Column(Enum(AssetStatus), primary_key=True)
+    category = Column(Enum(AssetCategory), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)  # Maintained by app.counters
+
+class AuditRollup(Base):
+    __tablename__ = "audit_rollups"
+
+    period = Column(String(4), primary_key=True)  # "hour" or "day"
+    bucket = Column(DateTime, primary_key=True)  # Start of the hour/day
+    action = Column(String(50), primary_key=True)
+    entity_type = Column(String(50), primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)  # Maintained by app.audit_rollups
+
+class ChangeSequence(Base):
+    __tablename__ = "change_sequence"
+    
+    name = Column(String(50), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+class AssetTombstone(Base):
+    __tablename__ = "asset_tombstones"
+    __table_args__ = (
+        Index("ix_asset_tombstones_change_seq", "change_seq", "asset_id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    asset_id = Column(Integer, nullable=False)
+    asset_tag = Column(String(50), nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class QRImage(Base):
+    __tablename__ = "qr_images"
+    
+    key = Column(String(64), primary_key=True)  # app.qr_store.qr_key of the payload
+    png = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
 EOF
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""Opaque cursor helpers for keyset pagination"""
+from fastapi import HTTPException
+from datetime import datetime
+from typing import Any, List
+import base64
+import json
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, *types: type) -> List[Any]:
+    """Decode a cursor produced by encode_cursor into values of ``types`` (int or datetime).
+    
+    Anything malformed, including a value of the wrong type, is a 400.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    decoded = []
+    for value, kind in zip(values, types):
+        if kind is datetime and isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        # bool is an int subclass, but never a valid id
+        if not isinstance(value, kind) or isinstance(value, bool):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        decoded.append(value)
+    return decoded
+
+def split_page(rows: list, limit: int) -> tuple:
+    """Split a limit+1 fetch into (page, has_more)"""
+    return rows[:limit], len(rows) > limit
@@ -0,0 +1,31 @@
+"""Bounded in-memory LRU for rendered QR code PNGs"""
+from collections import OrderedDict
+from typing import Optional
+from .config import settings
+
+class QRCodeCache:
+    """LRU of PNG bytes keyed by asset tag"""
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+    
+    def get(self, asset_tag: str) -> Optional[bytes]:
+        png = self._items.get(asset_tag)
+        if png is not None:
+            self._items.move_to_end(asset_tag)
+        return png
+    
+    def put(self, asset_tag: str, png: bytes):
+        self._items[asset_tag] = png
+        self._items.move_to_end(asset_tag)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+    
+    def discard(self, asset_tag: str):
+        self._items.pop(asset_tag, None)
+    
+    def __len__(self) -> int:
+        return len(self._items)
+
+qr_cache = QRCodeCache(settings.QR_CACHE_SIZE)
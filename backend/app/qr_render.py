@@ -0,0 +1,103 @@
+"""QR code and label sheet rendering, run in a process pool off the event loop"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from PIL import Image, ImageDraw, ImageFont
+import asyncio
+import qrcode
+import io
+from .config import settings
+
+QR_VERSION, QR_BOX_SIZE, QR_BORDER = 1, 10, 4
+
+# US Letter at 200 DPI, 4 x 6 labels per page
+SHEET_DPI = 200
+SHEET_SIZE = (1700, 2200)
+SHEET_MARGIN = 50
+SHEET_COLUMNS, SHEET_ROWS = 4, 6
+LABELS_PER_SHEET = SHEET_COLUMNS * SHEET_ROWS
+
+_pool: Optional[ProcessPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None
+
+def _make_qr_image(data: str, box_size: int = QR_BOX_SIZE) -> Image.Image:
+    qr = qrcode.QRCode(version=QR_VERSION, box_size=box_size, border=QR_BORDER)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr.make_image(fill_color="black", back_color="white").get_image()
+
+def generate_qr_code(data: str) -> bytes:
+    """Generate QR code as PNG bytes"""
+    img = _make_qr_image(data)
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def _load_font(size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single fixed-size bitmap font
+        return ImageFont.load_default()
+
+def _draw_label(sheet: Image.Image, box: Tuple[int, int, int, int], payload: str,
+                asset_tag: str, name: str, fonts: Tuple[ImageFont.ImageFont, ImageFont.ImageFont]):
+    left, top, right, bottom = box
+    width, height = right - left, bottom - top
+    qr_img = _make_qr_image(payload, box_size=8)
+    side = min(width, height - 70)
+    qr_img = qr_img.resize((side, side), Image.NEAREST)
+    sheet.paste(qr_img, (left + (width - side) // 2, top))
+    
+    draw = ImageDraw.Draw(sheet)
+    tag_font, name_font = fonts
+    draw.text((left + width // 2, top + side + 5), asset_tag, fill=0, font=tag_font, anchor="mt")
+    if len(name) > 32:
+        name = name[:31] + "…"
+    draw.text((left + width // 2, top + side + 40), name, fill=0, font=name_font, anchor="mt")
+
+def render_label_sheet(labels: List[Tuple[str, str, str]], fmt: str = "pdf", page: int = 1) -> bytes:
+    """Lay out (payload, asset_tag, name) labels on printable pages.
+    
+    ``pdf`` returns every page as one document; ``png`` has no multi-page
+    form, so it returns the single requested page.
+    """
+    pages = [labels[i:i + LABELS_PER_SHEET] for i in range(0, len(labels), LABELS_PER_SHEET)] or [[]]
+    if fmt == "png":
+        pages = pages[page - 1:page]
+    
+    fonts = (_load_font(32), _load_font(24))
+    cell_w = (SHEET_SIZE[0] - 2 * SHEET_MARGIN) // SHEET_COLUMNS
+    cell_h = (SHEET_SIZE[1] - 2 * SHEET_MARGIN) // SHEET_ROWS
+    images = []
+    for page_labels in pages:
+        sheet = Image.new("L", SHEET_SIZE, 255)
+        for i, (payload, asset_tag, name) in enumerate(page_labels):
+            col, row = i % SHEET_COLUMNS, i // SHEET_COLUMNS
+            left = SHEET_MARGIN + col * cell_w
+            top = SHEET_MARGIN + row * cell_h
+            _draw_label(sheet, (left + 10, top + 10, left + cell_w - 10, top + cell_h - 10),
+                        payload, asset_tag, name or "", fonts)
+        images.append(sheet.convert("1"))
+    
+    buffer = io.BytesIO()
+    if fmt == "png":
+        images[0].save(buffer, format="PNG", dpi=(SHEET_DPI, SHEET_DPI))
+    else:
+        images[0].save(buffer, format="PDF", resolution=SHEET_DPI, save_all=True,
+                       append_images=images[1:])
+    return buffer.getvalue()
+
+async def run_in_render_pool(fn, *args):
+    """Run a rendering function in the process pool, bounded by QR_RENDER_CONCURRENCY"""
+    global _pool, _slots
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.QR_RENDER_WORKERS)
+        _slots = asyncio.Semaphore(settings.QR_RENDER_CONCURRENCY)
+    async with _slots:
+        return await asyncio.get_running_loop().run_in_executor(_pool, fn, *args)
+
+def shutdown_render_pool():
+    """Stop worker processes; called on application shutdown"""
+    global _pool, _slots
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool, _slots = None, None
@@ -0,0 +1,63 @@
+"""Content-addressed store for rendered QR code PNGs.
+
+Images live in ``qr_images`` keyed by a SHA-256 of the QR payload and layout,
+so asset rows carry only the 64-character key and a re-render of the same
+payload maps to the row that already exists. An asset's key is set when it is
+created; rows from before that are filled in the first time their QR is read.
+"""
+from sqlalchemy import select, insert, update, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Dict, Iterable, List
+import hashlib
+from .models import Asset, QRImage
+from .qr_render import QR_VERSION, QR_BOX_SIZE, QR_BORDER
+
+def qr_key(payload: str) -> str:
+    """Blob key for a payload; rendering is deterministic in payload and layout"""
+    return hashlib.sha256(f"{payload}|{QR_VERSION}|{QR_BOX_SIZE}|{QR_BORDER}".encode()).hexdigest()
+
+def qr_payload(asset_tag: str) -> str:
+    """QR code contains asset lookup URL"""
+    return f"asset://{asset_tag}"
+
+def asset_qr_key(asset_tag: str) -> str:
+    return qr_key(qr_payload(asset_tag))
+
+async def load_qr_images(db: AsyncSession, keys: List[str]) -> Dict[str, bytes]:
+    """Stored PNGs for these keys, in one query; missing keys are absent"""
+    result = await db.execute(select(QRImage.key, QRImage.png).filter(QRImage.key.in_(keys)))
+    return dict(result.fetchall())
+
+async def save_qr_image(db: AsyncSession, key: str, png: bytes):
+    """Store a PNG under its key, in the caller's transaction; an existing row wins"""
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(QRImage.__table__)
+        await db.execute(stmt.on_conflict_do_nothing(index_elements=["key"]), [{"key": key, "png": png}])
+    elif not await load_qr_images(db, [key]):
+        await db.execute(insert(QRImage), [{"key": key, "png": png}])
+
+async def fill_qr_keys(db: AsyncSession, assets: Iterable[Asset]):
+    """Point assets without a current ``qr_key`` at their image, in the caller's transaction.
+    
+    A Core UPDATE, so the ORM hooks don't treat a derived column as an asset
+    change: no new change_seq, change feed event or cache invalidation.
+    """
+    stale = {}
+    for asset in assets:
+        key = asset_qr_key(asset.asset_tag)
+        if asset.qr_key != key:
+            stale[asset] = key
+    if not stale:
+        return
+    table = Asset.__table__
+    await db.execute(
+        # updated_at is kept as is rather than taking its onupdate default
+        update(table).where(table.c.id == bindparam("asset_id"))
+        .values(qr_key=bindparam("new_key"), updated_at=table.c.updated_at),
+        [{"asset_id": asset.id, "new_key": key} for asset, key in stale.items()]
+    )
+    for asset, key in stale.items():
+        set_committed_value(asset, "qr_key", key)
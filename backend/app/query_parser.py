@@ -0,0 +1,149 @@
+"""Deterministic parser for simple natural-language asset searches.
+
+Handles queries made only of known vocabulary -- categories, statuses,
+departments, user names and filler words -- and returns the same dict shape
+as ``parse_query_with_ai``. Anything it isn't sure about returns ``None`` so
+the caller can fall back to the LLM.
+"""
+from typing import Dict, Iterable, Optional, Tuple
+import re
+from .models import AssetCategory, AssetStatus
+
+CATEGORY_WORDS = {
+    AssetCategory.LAPTOP: ["laptop", "laptops", "notebook", "notebooks"],
+    AssetCategory.MONITOR: ["monitor", "monitors", "display", "displays", "screen", "screens"],
+    AssetCategory.KEYBOARD: ["keyboard", "keyboards"],
+    AssetCategory.MOUSE: ["mouse", "mice"],
+    AssetCategory.HEADSET: ["headset", "headsets", "headphones", "earbuds"],
+    AssetCategory.PHONE: ["phone", "phones", "mobile", "mobiles", "iphone", "iphones"],
+    AssetCategory.LICENSE: ["license", "licenses", "licence", "licences"],
+    AssetCategory.KEY: ["key", "keys"],
+}
+
+STATUS_WORDS = {
+    AssetStatus.AVAILABLE: ["available", "free", "in stock", "spare"],
+    AssetStatus.CHECKED_OUT: ["checked out", "checked-out", "in use", "on loan"],
+    AssetStatus.MAINTENANCE: ["maintenance", "in repair", "repair", "being repaired", "broken"],
+    AssetStatus.RETIRED: ["retired", "decommissioned", "disposed"],
+}
+
+UNASSIGNED_WORDS = ["unassigned", "not assigned", "nobody has", "no one has", "no owner"]
+
+STOPWORDS = {
+    "show", "me", "all", "the", "a", "an", "any", "list", "find", "get", "give",
+    "in", "on", "with", "of", "for", "to", "assigned", "by", "belonging",
+    "owned", "what", "which", "does", "do", "have", "has", "is", "are", "that",
+    "our", "please", "items", "assets", "equipment", "from", "department",
+    "dept", "team", "who", "s", "currently", "there", "every", "at",
+}
+
+# A word after these names an owner; if it isn't a known person or department
+# the LLM has to resolve it, so it must not become a free-text keyword
+ASSIGNMENT_CUES = {"assigned", "by", "belonging", "owned"}
+OWNER_CONNECTORS = {"to", "by", "the"}
+
+NEGATIONS = {"not", "no", "except", "without", "excluding", "but", "or"}
+
+MAX_NGRAM = 4
+
+class ParserMetrics:
+    """Hit rate of the local parser and an estimate of LLM time it saved"""
+    
+    def __init__(self):
+        self.local_hits = 0
+        self.ai_fallbacks = 0
+        self.ai_calls = 0
+        self.ai_seconds = 0.0
+    
+    def record_local_hit(self):
+        self.local_hits += 1
+    
+    def record_fallback(self):
+        self.ai_fallbacks += 1
+    
+    def record_ai_call(self, seconds: float):
+        self.ai_calls += 1
+        self.ai_seconds += seconds
+    
+    def snapshot(self) -> dict:
+        total = self.local_hits + self.ai_fallbacks
+        avg_ai_ms = self.ai_seconds / self.ai_calls * 1000 if self.ai_calls else 0.0
+        return {
+            "local_hits": self.local_hits,
+            "ai_fallbacks": self.ai_fallbacks,
+            "local_hit_rate": self.local_hits / total if total else 0.0,
+            "ai_calls": self.ai_calls,
+            "avg_ai_latency_ms": round(avg_ai_ms, 1),
+            "estimated_ms_saved": round(avg_ai_ms * self.local_hits, 1),
+        }
+
+parser_metrics = ParserMetrics()
+
+def _tokens(text: str) -> list:
+    return re.findall(r"[a-z0-9]+(?:-[a-z0-9]+)*", text.lower())
+
+def build_vocabulary(departments: Iterable[str], full_names: Iterable[str]) -> Dict[str, Tuple[str, object]]:
+    """Map each known phrase (as a space-joined token string) to the field it sets"""
+    vocab: Dict[str, Tuple[str, object]] = {}
+    for name in full_names:
+        if name and _tokens(name):
+            vocab[" ".join(_tokens(name))] = ("assigned_to_name", name)
+    for department in departments:
+        if department and _tokens(department):
+            vocab[" ".join(_tokens(department))] = ("department", department)
+    for category, words in CATEGORY_WORDS.items():
+        for word in words:
+            vocab[" ".join(_tokens(word))] = ("category", category.value)
+    for asset_status, words in STATUS_WORDS.items():
+        for word in words:
+            vocab[" ".join(_tokens(word))] = ("status", asset_status.value)
+    for word in UNASSIGNED_WORDS:
+        vocab[" ".join(_tokens(word))] = ("unassigned", True)
+    return vocab
+
+def parse_query_locally(query: str, vocab: Dict[str, Tuple[str, object]],
+                        max_keywords: int = 2) -> Optional[dict]:
+    """Parse ``query`` without the LLM, or return None if it isn't clear-cut.
+    
+    Confident means: at least one structured field matched, no field matched
+    twice with different values, no negation left over, and at most
+    ``max_keywords`` unrecognised words (kept as free-text keywords).
+    """
+    tokens = _tokens(query)
+    params = {"keywords": [], "category": None, "status": None,
+              "department": None, "assigned_to_name": None, "unassigned": False}
+    matched = False
+    expect_owner = False
+    i = 0
+    while i < len(tokens):
+        for n in range(min(MAX_NGRAM, len(tokens) - i), 0, -1):
+            phrase = " ".join(tokens[i:i + n])
+            if phrase in vocab:
+                field, value = vocab[phrase]
+                if params[field] not in (None, False, value):
+                    return None
+                params[field] = value
+                matched = True
+                expect_owner = False
+                i += n
+                break
+        else:
+            token = tokens[i]
+            if token in NEGATIONS:
+                return None
+            if token in ASSIGNMENT_CUES:
+                expect_owner = True
+            elif token not in STOPWORDS:
+                if expect_owner:
+                    return None
+                params["keywords"].append(token)
+            elif token not in OWNER_CONNECTORS:
+                expect_owner = False
+            i += 1
+    
+    if not matched or len(params["keywords"]) > max_keywords:
+        return None
+    if params["unassigned"] and (params["assigned_to_name"] or params["department"]):
+        return None
+    return params
+
@@ -0,0 +1,153 @@
+"""Versioned cache of serialized asset read responses with strong ETags.
+
+Entries hold the exact JSON bytes a read endpoint returned. Their keys embed
+a per-asset version (and a list version), so committing a change only bumps
+counters and never has to find stale entries; the LRU ages them out. A
+read only stores its result if no commit invalidated anything while it was
+querying, so a read racing with a commit can't cache the old row.
+"""
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Hashable, Iterable, NamedTuple, Optional
+import hashlib
+import time
+from .cache import TTLCache
+from .config import settings
+from .database import is_replica
+from .models import Asset, CheckoutHistory
+from .shared_cache import invalidation_bus
+
+DASHBOARD_KEY = "dashboard"
+
+class CachedBody(NamedTuple):
+    etag: str
+    body: bytes
+    asset_tag: Optional[str] = None
+    media_type: str = "application/json"
+
+def make_body(content: Any, asset_tag: Optional[str] = None) -> CachedBody:
+    """Serialize like FastAPI's JSONResponse; the ETag is a hash of those bytes.
+    
+    Bodies include ``updated_at``, so the tag changes with every update, and
+    also when a nested assignee changes without touching the asset row.
+    """
+    return make_body_from_bytes(JSONResponse(jsonable_encoder(content)).body, asset_tag)
+
+def make_body_from_bytes(body: bytes, asset_tag: Optional[str] = None,
+                         media_type: str = "application/json") -> CachedBody:
+    return CachedBody(f'"{hashlib.sha256(body).hexdigest()[:32]}"', body, asset_tag, media_type)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [t.strip() for t in header.split(",")]
+
+def cached_response(request: Request, entry: CachedBody) -> Response:
+    """200 with the cached bytes, or 304 if the client already has them"""
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, entry.etag):
+        read_cache.metrics["not_modified"] += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+class ReadCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize, ttl)
+        self._tags = TTLCache(maxsize, ttl)
+        self._versions: Dict[int, int] = {}
+        self._list_version = 0
+        self._generation = 0
+        self._stamp = 0
+        self._invalidated_at = float("-inf")
+        self.metrics = {"hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0}
+    
+    def asset_key(self, asset_id: int) -> Hashable:
+        return ("asset", asset_id, self._versions.get(asset_id, 0), self._generation)
+    
+    def history_key(self, asset_id: int) -> Hashable:
+        return ("history", asset_id, self._versions.get(asset_id, 0), self._generation)
+    
+    def list_key(self, params: Hashable) -> Hashable:
+        return ("list", params, self._list_version, self._generation)
+    
+    def tag_key(self, asset_tag: str) -> Optional[Hashable]:
+        asset_id = self._tags.get(asset_tag)
+        return self.asset_key(asset_id) if asset_id is not None else None
+    
+    def get(self, key: Optional[Hashable]) -> Optional[CachedBody]:
+        entry = self._entries.get(key) if key is not None else None
+        self.metrics["hits" if entry is not None else "misses"] += 1
+        return entry
+    
+    def stamp(self, db: Optional[AsyncSession] = None) -> Optional[int]:
+        """Take before querying; pass to ``set`` so stale reads are not stored.
+    
+        A replica may not have replayed a change yet, so its reads are not
+        cached until the last invalidation is older than the allowed lag.
+        """
+        if db is not None and is_replica(db) and not self.settled():
+            return None
+        return self._stamp
+    
+    def settled(self) -> bool:
+        return time.monotonic() - self._invalidated_at > settings.REPLICA_MAX_LAG_SECONDS
+    
+    def is_current(self, stamp: Optional[int]) -> bool:
+        """True if nothing was invalidated since ``stamp`` was taken"""
+        return stamp is not None and stamp == self._stamp
+    
+    def set(self, key: Hashable, entry: CachedBody, stamp: Optional[int]):
+        if self.is_current(stamp):
+            self._entries.set(key, entry)
+    
+    def remember_tag(self, asset_tag: str, asset_id: int):
+        self._tags.set(asset_tag, asset_id)
+    
+    def invalidate_assets(self, asset_ids: Iterable[int]):
+        """Retire cached reads of these assets and every cached listing"""
+        for asset_id in asset_ids:
+            self._versions[asset_id] = self._versions.get(asset_id, 0) + 1
+        self._list_version += 1
+        self._stamp += 1
+        self._invalidated_at = time.monotonic()
+        self.metrics["invalidations"] += 1
+    
+    def invalidate_all(self):
+        self._generation += 1
+        self._stamp += 1
+        self._invalidated_at = time.monotonic()
+        self.metrics["invalidations"] += 1
+
+read_cache = ReadCache(settings.READ_CACHE_SIZE, settings.READ_CACHE_TTL)
+
+def publish_asset_changes(asset_ids: Iterable[int]):
+    """Invalidate cached reads of these assets (and listings, dashboard) in every worker"""
+    invalidation_bus.publish("assets", sorted(asset_ids), shared_keys=[DASHBOARD_KEY])
+
+invalidation_bus.on("assets", read_cache.invalidate_assets)
+# Assignee details are nested in asset responses
+invalidation_bus.on("users", lambda user_ids: read_cache.invalidate_all())
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_assets(session, flush_context):
+    changed = session.info.setdefault("read_cache_assets", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Asset):
+            changed.add(obj.id)
+        elif isinstance(obj, CheckoutHistory):
+            changed.add(obj.asset_id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_assets(session):
+    changed = session.info.pop("read_cache_assets", None)
+    if changed:
+        publish_asset_changes(changed)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_assets(session):
+    session.info.pop("read_cache_assets", None)
@@ -1,21 +1,38 @@
 """Asset management endpoints"""
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File, Body, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, or_, and_
 from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from sqlalchemy.sql import Select
+from typing import Any, List, Optional, Tuple, Union
 from datetime import datetime
+import asyncio
 import uuid
-import io
-import csv
-from ..database import get_db
-from ..models import Asset, User, AssetStatus, AssetCategory, CheckoutHistory, AuditLog
+from ..database import get_db, get_read_db
+from ..models import Asset, User, AssetStatus, AssetCategory, CheckoutHistory, AuditLog, AssetCounter, AssetTombstone
 from ..schemas import (
     AssetCreate, AssetUpdate, AssetResponse, AssetCheckout, 
-    AssetCheckin, DashboardStats, ExportRequest
+    AssetCheckin, DashboardStats, ExportRequest, AssetPage, BulkImportResult,
+    BulkCheckout, BulkCheckin, BulkStatusChange, BulkActionResult,
+    AssetChanges, AssetTombstoneResponse
 )
-from ..auth import get_current_user, require_admin
+from ..auth import get_current_user, get_stream_user, require_admin
+from ..counters import move_asset_count
+from ..pagination import encode_cursor, decode_cursor, split_page
+from ..export import iter_export_rows, stream_csv, stream_xlsx, stream_parquet
+from ..bulk_import import import_assets, iter_json_rows, iter_jsonl_rows, iter_csv_rows
+from ..bulk_actions import bulk_checkout, bulk_checkin, bulk_set_status
+from ..audit_writer import enqueue_audit
+from ..audit_rollups import add_audit_rollups
+from ..config import settings
+from ..read_cache import read_cache, make_body, make_body_from_bytes, cached_response, publish_asset_changes, DASHBOARD_KEY
+from ..shared_cache import shared_cache
+from ..change_feed import change_feed, iter_events
+from ..formats import negotiate, require, parse_fieldset, asset_row_query, fetch_asset_rows, render, MEDIA_TYPES, FORMAT_PATTERN
+from ..sync import read_sequence, ASSETS_SEQUENCE, PRUNED_SEQUENCE
+from ..qr_store import asset_qr_key
+from .audit import audit_log_query
 
 router = APIRouter()
 
@@ -32,46 +49,53 @@ async def log_audit(
     changes: dict,
     request: Optional[Request] = None
 ):
-    """Create audit log entry"""
-    audit = AuditLog(
+    """Create audit log entry (in this transaction, or via the buffered pipeline)"""
+    entry = dict(
         action=action,
         entity_type=entity_type,
         entity_id=entity_id,
         user_id=user_id,
         changes=changes,
         ip_address=request.client.host if request else None,
-        user_agent=request.headers.get("user-agent") if request else None
+        user_agent=request.headers.get("user-agent") if request else None,
+        timestamp=datetime.utcnow()
     )
-    db.add(audit)
+    if settings.AUDIT_MODE == "buffered":
+        await enqueue_audit(db, entry)
+    else:
+        db.add(AuditLog(**entry))
+        await add_audit_rollups(db, [entry])
 
 @router.get("/dashboard", response_model=DashboardStats)
 async def get_dashboard_stats(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get dashboard statistics"""
-    status_counts = {}
-    for s in AssetStatus:
-        result = await db.execute(
-            select(func.count(Asset.id)).filter(Asset.status == s)
-        )
-        status_counts[s.value] = result.scalar()
-    
+    """Get dashboard statistics (shared across workers until an asset changes)"""
+    body = await shared_cache.get(DASHBOARD_KEY)
+    if body is None:
+        stamp = read_cache.stamp(db)
+        entry = make_body(await _dashboard_stats(db))
+        # Skip storing if an asset changed while the stats were computed
+        if read_cache.is_current(stamp):
+            await shared_cache.set(DASHBOARD_KEY, entry.body, settings.DASHBOARD_CACHE_TTL)
+    else:
+        entry = make_body_from_bytes(body)
+    return cached_response(request, entry)
+
+async def _dashboard_stats(db: AsyncSession) -> DashboardStats:
+    status_counts = {s.value: 0 for s in AssetStatus}
     category_counts = {}
-    for category in AssetCategory:
-        result = await db.execute(
-            select(func.count(Asset.id)).filter(Asset.category == category)
-        )
-        count = result.scalar()
-        if count > 0:
-            category_counts[category.value] = count
-    
     result = await db.execute(
-        select(AuditLog)
-        .filter(AuditLog.entity_type == "asset")
-        .order_by(AuditLog.timestamp.desc())
-        .limit(10)
+        select(AssetCounter.status, AssetCounter.category, AssetCounter.count)
+        .filter(AssetCounter.count > 0)
     )
+    for asset_status, category, count in result.fetchall():
+        status_counts[asset_status.value] += count
+        category_counts[category.value] = category_counts.get(category.value, 0) + count
+    
+    result = await db.execute(audit_log_query(entity_type="asset").limit(10))
     recent = result.scalars().all()
     
     total = sum(status_counts.values())
@@ -86,6 +110,104 @@ async def get_dashboard_stats(
         recent_activity=recent
     )
 
+def _feed_filters(
+    asset_id: Optional[List[int]],
+    category: Optional[List[AssetCategory]],
+    status_filter: Optional[List[AssetStatus]],
+    assigned_to: Optional[List[int]]
+) -> dict:
+    return {
+        "asset_id": set(asset_id or []),
+        "category": {c.value for c in category or []},
+        "status": {s.value for s in status_filter or []},
+        "assigned_to": set(assigned_to or []),
+    }
+
+@router.get("/stream")
+async def stream_asset_changes(
+    request: Request,
+    asset_id: Optional[List[int]] = Query(None),
+    category: Optional[List[AssetCategory]] = Query(None),
+    status_filter: Optional[List[AssetStatus]] = Query(None),
+    assigned_to: Optional[List[int]] = Query(None),
+    last_event_id: Optional[str] = None,
+    current_user: User = Depends(get_stream_user)
+):
+    """Server-Sent Events of asset changes matching every given filter.
+    
+    Reconnects resume after ``Last-Event-ID``; a ``reset`` event means the
+    missed changes are gone (or were numbered by another worker) and the
+    client should refetch the assets.
+    """
+    last_event_id = request.headers.get("last-event-id", last_event_id)
+    subscription = change_feed.subscribe(
+        _feed_filters(asset_id, category, status_filter, assigned_to), last_event_id
+    )
+    
+    async def events():
+        try:
+            if subscription.backlog is None:
+                yield "event: reset\ndata: {}\n\n"
+            async for feed_event in iter_events(subscription):
+                if feed_event is None:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"id: {feed_event.id}\nevent: asset\ndata: {feed_event.data}\n\n"
+        finally:
+            change_feed.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _until_disconnected(websocket: WebSocket):
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+@router.websocket("/ws")
+async def asset_changes_socket(
+    websocket: WebSocket,
+    asset_id: Optional[List[int]] = Query(None),
+    category: Optional[List[AssetCategory]] = Query(None),
+    status_filter: Optional[List[AssetStatus]] = Query(None),
+    assigned_to: Optional[List[int]] = Query(None),
+    last_event_id: Optional[str] = None,
+    current_user: User = Depends(get_stream_user)
+):
+    """WebSocket form of ``/stream``: one JSON change per message, ``{"action": "reset"}`` on a gap"""
+    await websocket.accept()
+    subscription = change_feed.subscribe(
+        _feed_filters(asset_id, category, status_filter, assigned_to), last_event_id
+    )
+    disconnected = asyncio.create_task(_until_disconnected(websocket))
+    try:
+        if subscription.backlog is None:
+            await websocket.send_text('{"action": "reset"}')
+        async for feed_event in iter_events(subscription):
+            if disconnected.done():
+                return
+            if feed_event is not None:
+                await websocket.send_text(feed_event.data)
+        # Fell too far behind; the client reconnects with its last id
+        await websocket.close(code=1013)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        change_feed.unsubscribe(subscription)
+        disconnected.cancel()
+
+@router.get("/stream/metrics")
+async def get_change_feed_metrics(current_user: User = Depends(require_admin)):
+    """Change feed subscribers and delivery counts (admin only)"""
+    return change_feed.snapshot()
+
 @router.post("/", response_model=AssetResponse, status_code=status.HTTP_201_CREATED)
 async def create_asset(
     asset_data: AssetCreate,
@@ -105,10 +227,12 @@ async def create_asset(
     
     asset = Asset(
         asset_tag=asset_tag,
+        qr_key=asset_qr_key(asset_tag),
         **asset_data.model_dump(exclude={"asset_tag"})
     )
     db.add(asset)
     await db.flush()
+    await move_asset_count(db, None, None, asset.status, asset.category)
     
     await log_audit(db, "create", "asset", asset.id, current_user.id, 
                     {"asset_tag": asset_tag, "name": asset.name}, request)
@@ -117,59 +241,259 @@ async def create_asset(
     await db.refresh(asset)
     return asset
 
-@router.get("/", response_model=List[AssetResponse])
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_create_assets(
+    request: Request,
+    rows: List[Any] = Body(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create many assets from a JSON array; invalid rows are reported, not fatal"""
+    result = await import_assets(db, iter_json_rows(rows), current_user.id, generate_asset_tag, request)
+    publish_asset_changes([])
+    return result
+
+@router.post("/import", response_model=BulkImportResult)
+async def import_assets_file(
+    request: Request,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Import assets from a CSV (header row of field names) or JSON Lines upload"""
+    filename = (file.filename or "").lower()
+    if filename.endswith(".csv") or file.content_type == "text/csv":
+        rows = iter_csv_rows(file.file)
+    elif filename.endswith((".jsonl", ".ndjson")) or file.content_type in ("application/jsonl", "application/x-ndjson"):
+        rows = iter_jsonl_rows(file.file)
+    else:
+        raise HTTPException(status_code=400, detail="Upload a .csv or .jsonl file")
+    result = await import_assets(db, rows, current_user.id, generate_asset_tag, request)
+    publish_asset_changes([])
+    return result
+
+@router.post("/bulk/checkout", response_model=BulkActionResult)
+async def bulk_checkout_assets(
+    checkout_data: BulkCheckout,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Check out many assets to one user; unavailable assets are reported as conflicts"""
+    user_result = await db.execute(select(User.id).filter(User.id == checkout_data.user_id))
+    if user_result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Target user not found")
+    result = await bulk_checkout(db, checkout_data.asset_ids, checkout_data.user_id,
+                                 checkout_data.notes, current_user.id, request)
+    publish_asset_changes(result.succeeded)
+    return result
+
+@router.post("/bulk/checkin", response_model=BulkActionResult)
+async def bulk_checkin_assets(
+    checkin_data: BulkCheckin,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Check in many assets; assets that aren't checked out are reported as conflicts"""
+    result = await bulk_checkin(db, checkin_data.asset_ids, checkin_data.notes,
+                                current_user.id, request)
+    publish_asset_changes(result.succeeded)
+    return result
+
+@router.post("/bulk/status", response_model=BulkActionResult)
+async def bulk_change_status(
+    change: BulkStatusChange,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Move many assets to available, maintenance or retired"""
+    if change.status == AssetStatus.CHECKED_OUT:
+        raise HTTPException(status_code=400, detail="Use /bulk/checkout to check assets out")
+    result = await bulk_set_status(db, change.asset_ids, change.status, change.notes,
+                                   current_user.id, request)
+    publish_asset_changes(result.succeeded)
+    return result
+
+@router.get("/", response_model=Union[List[AssetResponse], AssetPage])
 async def list_assets(
+    request: Request,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     category: Optional[AssetCategory] = None,
     status_filter: Optional[AssetStatus] = None,
     assigned_to: Optional[int] = None,
-    db: AsyncSession = Depends(get_db),
+    format: Optional[str] = Query(None, pattern=FORMAT_PATTERN),
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List assets with optional filters"""
-    query = select(Asset).options(selectinload(Asset.assignee))
-    
+    """List assets with optional filters.
+    
+    Pass ``cursor`` (empty for the first page) to page by id and get an
+    ``AssetPage`` back; ``skip`` offsets are kept for older clients.
+    ``fields`` (comma-separated columns) and ``include=assignee`` trim the
+    query and the body to what the client needs.
+    The body is JSON, MessagePack, Arrow or Parquet per ``format`` or the
+    Accept header. Responses are cached until an asset changes and carry an ETag.
+    """
+    fmt = negotiate(request, format)
+    columns, with_assignee = parse_fieldset(fields, include)
+    key = read_cache.list_key((skip, limit, cursor, category, status_filter, assigned_to, fmt,
+                               tuple(columns), with_assignee))
+    entry = read_cache.get(key)
+    if entry is None:
+        stamp = read_cache.stamp(db)
+        body = await _list_assets(db, fmt, columns, with_assignee, skip, limit, cursor,
+                                  category, status_filter, assigned_to)
+        entry = make_body_from_bytes(body, media_type=MEDIA_TYPES[fmt])
+        read_cache.set(key, entry, stamp)
+    response = cached_response(request, entry)
+    response.headers["Vary"] = "Accept"
+    return response
+
+def asset_list_query(
+    columns: List[str],
+    category: Optional[AssetCategory] = None,
+    status_filter: Optional[AssetStatus] = None,
+    assigned_to: Optional[int] = None
+) -> Select:
+    """The list_assets SELECT with its filters, before paging"""
+    query = asset_row_query(columns)
     if category:
         query = query.filter(Asset.category == category)
     if status_filter:
         query = query.filter(Asset.status == status_filter)
     if assigned_to:
         query = query.filter(Asset.assigned_to == assigned_to)
+    return query
+
+async def _list_assets(
+    db: AsyncSession,
+    fmt: str,
+    columns: List[str],
+    with_assignee: bool,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    category: Optional[AssetCategory],
+    status_filter: Optional[AssetStatus],
+    assigned_to: Optional[int]
+) -> bytes:
+    query = asset_list_query(columns, category, status_filter, assigned_to)
+    
+    if cursor is not None:
+        if cursor:
+            (last_id,) = decode_cursor(cursor, int)
+            query = query.filter(Asset.id > last_id)
+        rows, users = await fetch_asset_rows(db, query.order_by(Asset.id).limit(limit + 1), with_assignee)
+        rows, has_more = split_page(rows, limit)
+        next_cursor = encode_cursor(rows[-1]["id"]) if has_more else None
+        return render(fmt, rows, users, columns, paged=True, next_cursor=next_cursor)
+    
+    rows, users = await fetch_asset_rows(db, query.offset(skip).limit(limit), with_assignee)
+    return render(fmt, rows, users, columns)
+
+def asset_changes_queries(seq: int, last_id: int, upper: int, limit: int) -> Tuple[Select, Select]:
+    """Assets and tombstones after ``(seq, last_id)`` up to ``upper``, one page plus one of each"""
+    def after(seq_column, id_column):
+        return and_(
+            or_(seq_column > seq, and_(seq_column == seq, id_column > last_id)),
+            seq_column <= upper
+        )
     
-    query = query.offset(skip).limit(limit)
-    result = await db.execute(query)
-    return result.scalars().all()
+    changed = (
+        select(Asset)
+        .filter(after(Asset.change_seq, Asset.id))
+        .order_by(Asset.change_seq, Asset.id)
+        .limit(limit + 1)
+    )
+    deleted = (
+        select(AssetTombstone)
+        .filter(after(AssetTombstone.change_seq, AssetTombstone.asset_id))
+        .order_by(AssetTombstone.change_seq, AssetTombstone.asset_id)
+        .limit(limit + 1)
+    )
+    return changed, deleted
 
-@router.get("/{asset_id}", response_model=AssetResponse)
-async def get_asset(
-    asset_id: int,
-    db: AsyncSession = Depends(get_db),
+@router.get("/changes", response_model=AssetChanges)
+async def get_asset_changes(
+    since: Optional[str] = None,
+    limit: int = Query(default=settings.SYNC_PAGE_SIZE, ge=1, le=5000),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get asset by ID"""
-    result = await db.execute(
-        select(Asset).options(selectinload(Asset.assignee)).filter(Asset.id == asset_id)
+    """Assets created, updated or deleted after the ``since`` sync token.
+    
+    Omit ``since`` for a full snapshot. Request again with ``next_token``
+    while ``has_more``, then keep the last ``next_token`` for the next sync.
+    """
+    # Every change numbered up to this value has committed
+    upper = await read_sequence(db, ASSETS_SEQUENCE)
+    seq, last_id = decode_cursor(since, int, int) if since else (0, 0)
+    if not isinstance(seq, int) or not isinstance(last_id, int):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    pruned = await read_sequence(db, PRUNED_SEQUENCE) if since else 0
+    if pruned and seq <= pruned:
+        raise HTTPException(status_code=410, detail="Sync token expired; sync again without since")
+    
+    changed, deleted = asset_changes_queries(seq, last_id, upper, limit)
+    result = await db.execute(changed.options(selectinload(Asset.assignee)))
+    rows = [(a.change_seq, a.id, a) for a in result.scalars().all()]
+    if since:
+        # A fresh snapshot has nothing to delete
+        result = await db.execute(deleted)
+        rows += [(t.change_seq, t.asset_id, t) for t in result.scalars().all()]
+    rows.sort(key=lambda r: r[:2])
+    page, has_more = split_page(rows, limit)
+    
+    return AssetChanges(
+        changed=[AssetResponse.model_validate(r[2]) for r in page if isinstance(r[2], Asset)],
+        deleted=[AssetTombstoneResponse.model_validate(r[2]) for r in page if isinstance(r[2], AssetTombstone)],
+        next_token=encode_cursor(*page[-1][:2]) if has_more else encode_cursor(upper + 1, 0),
+        has_more=has_more
     )
+
+async def _cached_asset(request: Request, db: AsyncSession, condition) -> Response:
+    """Serve one asset from the read cache, loading it with ``condition`` on a miss"""
+    stamp = read_cache.stamp(db)
+    result = await db.execute(select(Asset).options(selectinload(Asset.assignee)).filter(condition))
     asset = result.scalar_one_or_none()
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
-    return asset
+    entry = make_body(AssetResponse.model_validate(asset), asset.asset_tag)
+    read_cache.set(read_cache.asset_key(asset.id), entry, stamp)
+    read_cache.remember_tag(asset.asset_tag, asset.id)
+    return cached_response(request, entry)
+
+@router.get("/{asset_id}", response_model=AssetResponse)
+async def get_asset(
+    asset_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get asset by ID (cached; supports If-None-Match)"""
+    entry = read_cache.get(read_cache.asset_key(asset_id))
+    if entry is not None:
+        return cached_response(request, entry)
+    return await _cached_asset(request, db, Asset.id == asset_id)
 
 @router.get("/tag/{asset_tag}", response_model=AssetResponse)
 async def get_asset_by_tag(
     asset_tag: str,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get asset by asset tag (for QR code scanning)"""
-    result = await db.execute(
-        select(Asset).options(selectinload(Asset.assignee)).filter(Asset.asset_tag == asset_tag)
-    )
-    asset = result.scalar_one_or_none()
-    if not asset:
-        raise HTTPException(status_code=404, detail="Asset not found")
-    return asset
+    """Get asset by asset tag (for QR code scanning; cached, supports If-None-Match)"""
+    entry = read_cache.get(read_cache.tag_key(asset_tag))
+    if entry is not None and entry.asset_tag == asset_tag:
+        return cached_response(request, entry)
+    return await _cached_asset(request, db, Asset.asset_tag == asset_tag)
 
 @router.patch("/{asset_id}", response_model=AssetResponse)
 async def update_asset(
@@ -187,9 +511,11 @@ async def update_asset(
     
     update_data = asset_update.model_dump(exclude_unset=True)
     old_values = {k: getattr(asset, k) for k in update_data}
+    old_status, old_category = asset.status, asset.category
     
     for field, value in update_data.items():
         setattr(asset, field, value)
+    await move_asset_count(db, old_status, old_category, asset.status, asset.category)
     
     await log_audit(db, "update", "asset", asset.id, current_user.id,
                     {"old": old_values, "new": update_data}, request)
@@ -222,6 +548,7 @@ async def checkout_asset(
     
     asset.status = AssetStatus.CHECKED_OUT
     asset.assigned_to = checkout_data.user_id
+    await move_asset_count(db, AssetStatus.AVAILABLE, asset.category, asset.status, asset.category)
     
     history = CheckoutHistory(
         asset_id=asset.id,
@@ -268,6 +595,7 @@ async def checkin_asset(
     old_assignee = asset.assigned_to
     asset.status = AssetStatus.AVAILABLE
     asset.assigned_to = None
+    await move_asset_count(db, AssetStatus.CHECKED_OUT, asset.category, asset.status, asset.category)
     
     await log_audit(db, "checkin", "asset", asset.id, current_user.id,
                     {"previous_assignee": old_assignee, "notes": checkin_data.notes}, request)
@@ -289,62 +617,59 @@ async def delete_asset(
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
     
+    # Flush the delete first so the change sequence row is locked before the
+    # counter and rollup rows, in the same order as every other asset write
+    await db.delete(asset)
+    await db.flush()
+    await move_asset_count(db, asset.status, asset.category, None, None)
+    
     await log_audit(db, "delete", "asset", asset.id, current_user.id,
                     {"asset_tag": asset.asset_tag, "name": asset.name}, request)
-    
-    await db.delete(asset)
     await db.commit()
 
 @router.get("/{asset_id}/history")
 async def get_asset_history(
     asset_id: int,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get checkout history for an asset"""
-    result = await db.execute(
-        select(CheckoutHistory)
-        .filter(CheckoutHistory.asset_id == asset_id)
-        .order_by(CheckoutHistory.checkout_date.desc())
-    )
-    return result.scalars().all()
+    """Get checkout history for an asset (cached; supports If-None-Match)"""
+    key = read_cache.history_key(asset_id)
+    entry = read_cache.get(key)
+    if entry is None:
+        stamp = read_cache.stamp(db)
+        result = await db.execute(
+            select(CheckoutHistory)
+            .filter(CheckoutHistory.asset_id == asset_id)
+            .order_by(CheckoutHistory.checkout_date.desc())
+        )
+        entry = make_body(result.scalars().all())
+        read_cache.set(key, entry, stamp)
+    return cached_response(request, entry)
 
 @router.post("/export")
 async def export_assets(
     export_req: ExportRequest,
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Export assets to CSV"""
-    query = select(Asset).options(selectinload(Asset.assignee))
-    
-    if export_req.category:
-        query = query.filter(Asset.category == export_req.category)
-    if export_req.status:
-        query = query.filter(Asset.status == export_req.status)
-    
-    result = await db.execute(query)
-    assets = result.scalars().all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        "Asset Tag", "Name", "Category", "Status", "Serial Number",
-        "Manufacturer", "Model", "Location", "Assigned To", "Created At"
-    ])
-    
-    for asset in assets:
-        writer.writerow([
-            asset.asset_tag, asset.name, asset.category.value, asset.status.value,
-            asset.serial_number or "", asset.manufacturer or "", asset.model or "",
-            asset.location or "", asset.assignee.full_name if asset.assignee else "",
-            asset.created_at.isoformat()
-        ])
-    
-    output.seek(0)
-    filename = f"assets_{datetime.now().strftime('%Y%m%d')}.csv"
+    """Export assets to CSV, XLSX or Parquet, streamed in chunks"""
+    rows = iter_export_rows(export_req.category, export_req.status)
+    filename = f"assets_{datetime.now().strftime('%Y%m%d')}.{export_req.format}"
+    
+    if export_req.format == "xlsx":
+        body = stream_xlsx(rows)
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    elif export_req.format == "parquet":
+        require("pyarrow.parquet")
+        body = stream_parquet(rows)
+        media_type = MEDIA_TYPES["parquet"]
+    else:
+        body = stream_csv(rows)
+        media_type = "text/csv"
+    
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
+        body,
+        media_type=media_type,
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
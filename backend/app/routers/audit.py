@@ -1,32 +1,34 @@
 """Audit log endpoints"""
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from typing import List, Optional
+from sqlalchemy import select, tuple_
+from sqlalchemy.sql import Select
+from typing import List, Optional, Union
 from datetime import datetime, timedelta
-from ..database import get_db
-from ..models import AuditLog, User, UserRole
-from ..schemas import AuditLogResponse, AuditLogFilter
-from ..auth import get_current_user, require_admin_or_auditor
+from ..database import get_db, get_read_db
+from ..models import AuditLog, User
+from ..schemas import AuditLogResponse, AuditLogPage
+from ..auth import get_current_user, require_admin, require_admin_or_auditor
+from ..pagination import encode_cursor, decode_cursor, split_page
+from ..audit_writer import audit_writer
+from ..config import settings
+from .. import audit_partitions, audit_rollups
+from collections import Counter
+import os
 
 router = APIRouter()
 
-@router.get("/", response_model=List[AuditLogResponse])
-async def list_audit_logs(
-    skip: int = 0,
-    limit: int = 100,
+def audit_log_query(
     entity_type: Optional[str] = None,
     entity_id: Optional[int] = None,
     user_id: Optional[int] = None,
     action: Optional[str] = None,
     start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_admin_or_auditor)
-):
-    """List audit logs with filters (admin/auditor only)"""
+    end_date: Optional[datetime] = None
+) -> Select:
+    """Audit logs matching the list filters, newest first"""
     query = select(AuditLog).order_by(AuditLog.timestamp.desc())
-    
     if entity_type:
         query = query.filter(AuditLog.entity_type == entity_type)
     if entity_id:
@@ -39,6 +41,45 @@ async def list_audit_logs(
         query = query.filter(AuditLog.timestamp >= start_date)
     if end_date:
         query = query.filter(AuditLog.timestamp <= end_date)
+    return query
+
+def audit_keyset(query: Select, cursor: str) -> Select:
+    """Page an ``audit_log_query`` on ``(timestamp, id)``, after ``cursor`` if not empty"""
+    query = query.order_by(AuditLog.id.desc())
+    if cursor:
+        last_timestamp, last_id = decode_cursor(cursor, datetime, int)
+        query = query.filter(
+            tuple_(AuditLog.timestamp, AuditLog.id) < tuple_(last_timestamp, last_id)
+        )
+    return query
+
+@router.get("/", response_model=Union[List[AuditLogResponse], AuditLogPage])
+async def list_audit_logs(
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(require_admin_or_auditor)
+):
+    """List audit logs with filters (admin/auditor only).
+    
+    Pass ``cursor`` (empty for the first page) to page newest-first on
+    ``(timestamp, id)`` and get an ``AuditLogPage`` back.
+    """
+    query = audit_log_query(entity_type, entity_id, user_id, action, start_date, end_date)
+    
+    if cursor is not None:
+        query = audit_keyset(query, cursor)
+        result = await db.execute(query.limit(limit + 1))
+        items, has_more = split_page(result.scalars().all(), limit)
+        next_cursor = encode_cursor(items[-1].timestamp, items[-1].id) if has_more else None
+        return AuditLogPage(items=items, next_cursor=next_cursor)
     
     query = query.offset(skip).limit(limit)
     result = await db.execute(query)
@@ -48,67 +89,105 @@ async def list_audit_logs(
 async def get_entity_audit_trail(
     entity_type: str,
     entity_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get complete audit trail for a specific entity"""
-    query = (
-        select(AuditLog)
-        .filter(AuditLog.entity_type == entity_type, AuditLog.entity_id == entity_id)
-        .order_by(AuditLog.timestamp.desc())
-    )
-    result = await db.execute(query)
+    result = await db.execute(audit_log_query(entity_type=entity_type, entity_id=entity_id))
     return result.scalars().all()
 
 @router.get("/user/{user_id}", response_model=List[AuditLogResponse])
 async def get_user_audit_trail(
     user_id: int,
-    limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(require_admin_or_auditor)
 ):
     """Get all actions performed by a specific user (admin/auditor only)"""
-    query = (
-        select(AuditLog)
-        .filter(AuditLog.user_id == user_id)
-        .order_by(AuditLog.timestamp.desc())
-        .limit(limit)
-    )
-    result = await db.execute(query)
+    result = await db.execute(audit_log_query(user_id=user_id).limit(limit))
     return result.scalars().all()
 
+@router.get("/pipeline")
+async def get_audit_pipeline_metrics(current_user: User = Depends(require_admin_or_auditor)):
+    """Buffered audit writer queue depth, flush and backpressure metrics"""
+    return audit_writer.snapshot()
+
+@router.get("/partitions")
+async def get_audit_partitions(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin_or_auditor)
+):
+    """Monthly audit partitions still in the database and the archives already written"""
+    return {
+        "retention_months": settings.AUDIT_RETENTION_MONTHS,
+        "partitions": await audit_partitions.list_partitions(db),
+        "archives": audit_partitions.list_archives(),
+    }
+
+@router.post("/archive")
+async def archive_audit_logs(
+    month: Optional[str] = Query(default=None, pattern=r"^\d{4}-\d{2}$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Archive one month (``YYYY-MM``) or, without ``month``, everything past retention (admin only)"""
+    if month is None:
+        return {"archived": await audit_partitions.apply_retention(db)}
+    start = datetime.strptime(month, "%Y-%m")
+    if start >= audit_partitions.month_start(datetime.utcnow()):
+        raise HTTPException(status_code=400, detail="Cannot archive the current or a future month")
+    rows = await audit_partitions.archive_month(db, start)
+    return {"archived": [{"month": month, "rows": rows}]}
+
+@router.get("/archives/{name}")
+async def download_audit_archive(
+    name: str,
+    current_user: User = Depends(require_admin_or_auditor)
+):
+    """Download an archived month as gzipped JSON Lines"""
+    path = os.path.join(settings.AUDIT_ARCHIVE_DIR, name)
+    if not audit_partitions.ARCHIVE_NAME.match(name) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Archive not found")
+    return FileResponse(path, media_type="application/gzip", filename=name)
+
 @router.get("/summary")
 async def get_audit_summary(
     days: int = Query(default=30, le=365),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(require_admin_or_auditor)
 ):
-    """Get audit log summary statistics"""
+    """Get audit log summary statistics (served from hourly/daily rollups)"""
     cutoff = datetime.utcnow() - timedelta(days=days)
+    counts = await audit_rollups.summarize(db, cutoff)
     
-    action_counts = await db.execute(
-        select(AuditLog.action, func.count(AuditLog.id))
-        .filter(AuditLog.timestamp >= cutoff)
-        .group_by(AuditLog.action)
-    )
-    
-    entity_counts = await db.execute(
-        select(AuditLog.entity_type, func.count(AuditLog.id))
-        .filter(AuditLog.timestamp >= cutoff)
-        .group_by(AuditLog.entity_type)
-    )
-    
-    user_counts = await db.execute(
-        select(AuditLog.user_id, func.count(AuditLog.id))
-        .filter(AuditLog.timestamp >= cutoff)
-        .group_by(AuditLog.user_id)
-        .order_by(func.count(AuditLog.id).desc())
-        .limit(10)
-    )
+    actions, entity_types, users = Counter(), Counter(), Counter()
+    for (action, entity_type, user_id), count in counts.items():
+        actions[action] += count
+        entity_types[entity_type] += count
+        users[user_id] += count
     
     return {
         "period_days": days,
-        "actions": dict(action_counts.fetchall()),
-        "entity_types": dict(entity_counts.fetchall()),
-        "most_active_users": dict(user_counts.fetchall())
+        "actions": dict(actions),
+        "entity_types": dict(entity_types),
+        "most_active_users": dict(users.most_common(10))
+    }
+
+@router.get("/summary/series")
+async def get_audit_series(
+    days: int = Query(default=30, le=365),
+    interval: str = Query(default="day", pattern="^(hour|day)$"),
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(require_admin_or_auditor)
+):
+    """Audit event counts per hour or day for charting (hourly series cover at most 31 days)"""
+    if interval == "hour" and days > 31:
+        raise HTTPException(status_code=400, detail="Hourly series are limited to 31 days")
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    return {
+        "period_days": days,
+        "interval": interval,
+        "series": await audit_rollups.series(db, cutoff, interval, action, entity_type)
     }
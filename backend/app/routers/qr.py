@@ -1,53 +1,128 @@
 """QR Code generation endpoints"""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-import qrcode
-import io
+from typing import List
+import asyncio
 import base64
 from ..database import get_db
 from ..models import Asset, User
 from ..auth import get_current_user
+from ..config import settings
+from ..qr_cache import qr_cache
+from ..read_cache import etag_matches
+from ..qr_store import qr_key, qr_payload, load_qr_images, save_qr_image, fill_qr_keys
+from ..qr_render import LABELS_PER_SHEET, generate_qr_code, render_label_sheet, run_in_render_pool
 
 router = APIRouter()
 
-def generate_qr_code(data: str) -> bytes:
-    """Generate QR code as PNG bytes"""
-    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-    qr.add_data(data)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    return buffer.getvalue()
+def qr_etag(asset_tag: str) -> str:
+    """Strong ETag for a tag's QR image: its blob key"""
+    return '"' + qr_key(qr_payload(asset_tag))[:32] + '"'
 
-@router.get("/{asset_id}")
-async def get_asset_qr_code(
-    asset_id: int,
+async def get_qr_pngs(db: AsyncSession, assets: List[Asset]) -> List[bytes]:
+    """QR PNGs for assets from the LRU, then the blob store, rendering only misses.
+    
+    New renders are stored, and assets created before ``qr_key`` existed are
+    pointed at their image, in the caller's transaction.
+    """
+    keys = {asset.asset_tag: qr_key(qr_payload(asset.asset_tag)) for asset in assets}
+    images = {tag: qr_cache.get(tag) for tag in keys}
+    missing = [tag for tag, png in images.items() if png is None]
+    if missing:
+        stored = await load_qr_images(db, [keys[tag] for tag in missing])
+        to_render = [tag for tag in missing if keys[tag] not in stored]
+        rendered = await asyncio.gather(*[
+            run_in_render_pool(generate_qr_code, qr_payload(tag)) for tag in to_render
+        ])
+        for tag, png in zip(to_render, rendered):
+            await save_qr_image(db, keys[tag], png)
+            stored[keys[tag]] = png
+        for tag in missing:
+            images[tag] = stored[keys[tag]]
+            qr_cache.put(tag, images[tag])
+    await fill_qr_keys(db, assets)
+    return [images[asset.asset_tag] for asset in assets]
+
+async def qr_response(request: Request, db: AsyncSession, asset: Asset) -> Response:
+    """PNG response with caching headers, or 304 if the client's copy is current"""
+    etag = qr_etag(asset.asset_tag)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.QR_CACHE_MAX_AGE}"
+    }
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    
+    (png,) = await get_qr_pngs(db, [asset])
+    await db.commit()
+    return Response(content=png, media_type="image/png", headers=headers)
+
+@router.get("/batch")
+async def get_batch_qr_codes(
+    asset_ids: str,  # comma-separated
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Generate QR code for an asset"""
-    result = await db.execute(select(Asset).filter(Asset.id == asset_id))
-    asset = result.scalar_one_or_none()
-    if not asset:
-        raise HTTPException(status_code=404, detail="Asset not found")
+    """Generate multiple QR codes as base64 JSON"""
+    ids = [int(x.strip()) for x in asset_ids.split(",") if x.strip().isdigit()]
+    result = await db.execute(select(Asset).filter(Asset.id.in_(ids)))
+    assets = result.scalars().all()
     
-    # QR code contains asset lookup URL
-    qr_data = f"asset://{asset.asset_tag}"
-    qr_bytes = generate_qr_code(qr_data)
+    images = await get_qr_pngs(db, assets)
+    qr_codes = [
+        {
+            "asset_id": asset.id,
+            "asset_tag": asset.asset_tag,
+            "name": asset.name,
+            "qr_base64": base64.b64encode(qr_bytes).decode()
+        }
+        for asset, qr_bytes in zip(assets, images)
+    ]
     
-    # Cache QR code in database
-    if not asset.qr_code:
-        asset.qr_code = base64.b64encode(qr_bytes).decode()
-        await db.commit()
+    await db.commit()
+    return {"qr_codes": qr_codes}
+
+@router.get("/batch/sheet")
+async def get_batch_qr_sheet(
+    asset_ids: str,  # comma-separated
+    format: str = Query(default="pdf", pattern="^(pdf|png)$"),
+    page: int = Query(default=1, ge=1),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Printable label sheets (QR, tag, name) for many assets.
+    
+    PDF returns every page; PNG returns the single ``page`` requested.
+    """
+    ids = [int(x.strip()) for x in asset_ids.split(",") if x.strip().isdigit()]
+    if len(ids) > settings.QR_SHEET_MAX_LABELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.QR_SHEET_MAX_LABELS} labels per request"
+        )
+    result = await db.execute(
+        select(Asset.asset_tag, Asset.name).filter(Asset.id.in_(ids)).order_by(Asset.asset_tag)
+    )
+    labels = [(qr_payload(tag), tag, name) for tag, name in result.fetchall()]
+    if not labels:
+        raise HTTPException(status_code=404, detail="No matching assets")
+    if format == "png" and (page - 1) * LABELS_PER_SHEET >= len(labels):
+        raise HTTPException(status_code=404, detail="Page out of range")
     
-    return Response(content=qr_bytes, media_type="image/png")
+    document = await run_in_render_pool(render_label_sheet, labels, format, page)
+    media_type = "application/pdf" if format == "pdf" else "image/png"
+    return Response(
+        content=document,
+        media_type=media_type,
+        headers={"Content-Disposition": f"inline; filename=qr_labels.{format}"}
+    )
 
 @router.get("/tag/{asset_tag}")
 async def get_qr_by_tag(
     asset_tag: str,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -57,31 +132,19 @@ async def get_qr_by_tag(
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
     
-    qr_data = f"asset://{asset.asset_tag}"
-    qr_bytes = generate_qr_code(qr_data)
-    
-    return Response(content=qr_bytes, media_type="image/png")
+    return await qr_response(request, db, asset)
 
-@router.get("/batch")
-async def get_batch_qr_codes(
-    asset_ids: str,  # comma-separated
+@router.get("/{asset_id}")
+async def get_asset_qr_code(
+    asset_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Generate multiple QR codes as base64 JSON"""
-    ids = [int(x.strip()) for x in asset_ids.split(",") if x.strip().isdigit()]
-    result = await db.execute(select(Asset).filter(Asset.id.in_(ids)))
-    assets = result.scalars().all()
-    
-    qr_codes = []
-    for asset in assets:
-        qr_data = f"asset://{asset.asset_tag}"
-        qr_bytes = generate_qr_code(qr_data)
-        qr_codes.append({
-            "asset_id": asset.id,
-            "asset_tag": asset.asset_tag,
-            "name": asset.name,
-            "qr_base64": base64.b64encode(qr_bytes).decode()
-        })
+    """Generate QR code for an asset"""
+    result = await db.execute(select(Asset).filter(Asset.id == asset_id))
+    asset = result.scalar_one_or_none()
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
     
-    return {"qr_codes": qr_codes}
+    return await qr_response(request, db, asset)
@@ -1,17 +1,28 @@
 """AI-powered search endpoints"""
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, and_
-from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from sqlalchemy import select, and_
+from typing import Optional
 import httpx
+import copy
 import json
+import logging
+import orjson
 import re
-from ..database import get_db
+import time
+from ..database import get_read_db
 from ..models import Asset, User, AssetStatus, AssetCategory
-from ..schemas import SearchQuery, AISearchQuery, AssetResponse, SearchResult
-from ..auth import get_current_user
+from ..schemas import AISearchQuery, SearchResult
+from ..auth import get_current_user, require_admin
 from ..config import settings
+from ..fulltext import apply_text_search, tokenize
+from ..cache import TTLCache, SingleFlight
+from ..shared_cache import get_json, set_json
+from ..query_parser import build_vocabulary, parse_query_locally, parser_metrics
+from ..formats import parse_fieldset, asset_row_query, fetch_asset_rows, asset_items
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -32,41 +43,120 @@ Respond with a JSON object containing:
 Now parse this query:
 """
 
-async def parse_query_with_ai(query: str) -> dict:
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{settings.AI_API_URL}/chat/completions",
-                json={
-                    "model": settings.AI_MODEL,
-                    "messages": [
-                        {"role": "system", "content": "Output valid JSON only."},
-                        {"role": "user", "content": SEARCH_PROMPT + f'"{query}"'}
-                    ],
-                    "temperature": 0.1,
-                    "max_tokens": 200
-                },
-                headers={"Authorization": f"Bearer {settings.AI_API_KEY}"}
-            )
-            if response.status_code == 200:
-                result = response.json()
-                content = result["choices"][0]["message"]["content"]
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                if json_match:
-                    return json.loads(json_match.group())
-    except Exception as e:
-        print(f"AI search error: {e}")
+_ai_client: Optional[httpx.AsyncClient] = None
+_parse_flight = SingleFlight()
+_vocab_cache = TTLCache(1, settings.LOCAL_PARSER_VOCAB_TTL)
+
+async def start_ai_client():
+    """Create the shared, pooled HTTP client for the LLM endpoint"""
+    global _ai_client
+    if _ai_client is None:
+        _ai_client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=settings.AI_MAX_CONNECTIONS),
+            headers={"Authorization": f"Bearer {settings.AI_API_KEY}"}
+        )
+    return _ai_client
+
+async def close_ai_client():
+    global _ai_client
+    if _ai_client is not None:
+        await _ai_client.aclose()
+        _ai_client = None
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: case, surrounding punctuation and spacing don't matter"""
+    return " ".join(query.lower().split()).strip(" .,!?;:")
+
+def fallback_params(query: str) -> dict:
     return {"keywords": query.split(), "category": None, "status": None, 
             "department": None, "assigned_to_name": None, "unassigned": False}
 
+async def _call_ai(query: str) -> Optional[dict]:
+    client = await start_ai_client()
+    started = time.perf_counter()
+    try:
+        response = await client.post(
+            f"{settings.AI_API_URL}/chat/completions",
+            json={
+                "model": settings.AI_MODEL,
+                "messages": [
+                    {"role": "system", "content": "Output valid JSON only."},
+                    {"role": "user", "content": SEARCH_PROMPT + f'"{query}"'}
+                ],
+                "temperature": 0.1,
+                "max_tokens": 200
+            }
+        )
+        if response.status_code == 200:
+            result = response.json()
+            content = result["choices"][0]["message"]["content"]
+            json_match = re.search(r'\{.*\}', content, re.DOTALL)
+            if json_match:
+                return json.loads(json_match.group())
+    except Exception as e:
+        logger.warning(f"AI search error: {e}")
+    finally:
+        parser_metrics.record_ai_call(time.perf_counter() - started)
+    return None
+
+async def parse_query_with_ai(query: str) -> dict:
+    """Parse a query with the LLM, caching by normalized text in the shared cache.
+    
+    Concurrent identical queries in a worker share one upstream call. Failures
+    fall back to plain keywords and are not cached, so an outage doesn't stick.
+    """
+    key = normalize_query(query)
+    params = await get_json(f"ai-parse:{key}")
+    if params is None:
+        params = await _parse_flight.do(key, lambda: _call_ai(query))
+        if params is None:
+            return fallback_params(query)
+        await set_json(f"ai-parse:{key}", params, settings.AI_CACHE_TTL)
+        params = copy.deepcopy(params)
+    return params
+
+async def load_vocabulary(db: AsyncSession) -> dict:
+    """Known departments and user names for the local parser, refreshed every few minutes"""
+    vocab = _vocab_cache.get("vocab")
+    if vocab is None:
+        result = await db.execute(
+            select(User.department, User.full_name).filter(User.is_active == True)
+        )
+        rows = result.fetchall()
+        vocab = build_vocabulary({r.department for r in rows}, {r.full_name for r in rows})
+        _vocab_cache.set("vocab", vocab)
+    return vocab
+
+async def parse_query(query: str, db: AsyncSession) -> dict:
+    """Try the local rule-based parser first; only ambiguous queries reach the LLM"""
+    params = parse_query_locally(
+        query, await load_vocabulary(db), settings.LOCAL_PARSER_MAX_KEYWORDS
+    )
+    if params is not None:
+        parser_metrics.record_local_hit()
+        return params
+    parser_metrics.record_fallback()
+    return await parse_query_with_ai(query)
+
+async def search_response(db: AsyncSession, query, with_assignee: bool,
+                          interpretation: Optional[str] = None) -> Response:
+    """Run a search over asset rows and encode the SearchResult body directly"""
+    rows, users = await fetch_asset_rows(db, query, with_assignee)
+    body = {"assets": asset_items(rows, users), "total": len(rows), "query_interpretation": interpretation}
+    return Response(content=orjson.dumps(body), media_type="application/json")
+
 @router.post("/ai", response_model=SearchResult)
 async def ai_search(
     search_query: AISearchQuery,
-    db: AsyncSession = Depends(get_db),
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    params = await parse_query_with_ai(search_query.query)
-    query = select(Asset).options(selectinload(Asset.assignee))
+    columns, with_assignee = parse_fieldset(fields, include)
+    params = await parse_query(search_query.query, db)
+    query = asset_row_query(columns)
     conditions = []
     
     if params.get("category"):
@@ -79,24 +169,25 @@ async def ai_search(
             conditions.append(Asset.status == AssetStatus(params["status"]))
         except ValueError:
             pass
-    for keyword in params.get("keywords", []):
-        conditions.append(or_(
-            Asset.name.ilike(f"%{keyword}%"),
-            Asset.description.ilike(f"%{keyword}%"),
-            Asset.manufacturer.ilike(f"%{keyword}%")
-        ))
+    terms = tokenize(" ".join(str(k) for k in params.get("keywords") or []))
+    query = apply_text_search(query, terms, db.get_bind().dialect.name)
     if params.get("department"):
         subq = select(User.id).filter(User.department.ilike(f"%{params['department']}%"))
         conditions.append(Asset.assigned_to.in_(subq))
     if params.get("assigned_to_name"):
         subq = select(User.id).filter(User.full_name.ilike(f"%{params['assigned_to_name']}%"))
         conditions.append(Asset.assigned_to.in_(subq))
+    if params.get("unassigned"):
+        conditions.append(Asset.assigned_to == None)
     if conditions:
         query = query.filter(and_(*conditions))
     
-    result = await db.execute(query.limit(50))
-    assets = result.scalars().all()
-    return SearchResult(assets=assets, total=len(assets), query_interpretation=json.dumps(params))
+    return await search_response(db, query.limit(50), with_assignee, json.dumps(params))
+
+@router.get("/metrics")
+async def get_parser_metrics(current_user: User = Depends(require_admin)):
+    """Local parser hit rate and estimated LLM latency saved (admin only)"""
+    return parser_metrics.snapshot()
 
 @router.get("/", response_model=SearchResult)
 async def basic_search(
@@ -104,21 +195,17 @@ async def basic_search(
     category: Optional[AssetCategory] = None,
     status: Optional[AssetStatus] = None,
     limit: int = 20,
-    db: AsyncSession = Depends(get_db),
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = select(Asset).options(selectinload(Asset.assignee))
+    columns, with_assignee = parse_fieldset(fields, include)
+    query = asset_row_query(columns)
     if q:
-        query = query.filter(or_(
-            Asset.name.ilike(f"%{q}%"),
-            Asset.description.ilike(f"%{q}%"),
-            Asset.asset_tag.ilike(f"%{q}%"),
-            Asset.serial_number.ilike(f"%{q}%")
-        ))
+        query = apply_text_search(query, tokenize(q), db.get_bind().dialect.name)
     if category:
         query = query.filter(Asset.category == category)
     if status:
         query = query.filter(Asset.status == status)
-    result = await db.execute(query.limit(limit))
-    assets = result.scalars().all()
-    return SearchResult(assets=assets, total=len(assets))
+    return await search_response(db, query.limit(limit), with_assignee)
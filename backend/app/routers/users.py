@@ -1,17 +1,18 @@
 """User management endpoints"""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional, Union
 from ..database import get_db
-from ..models import User, UserRole
-from ..schemas import UserCreate, UserUpdate, UserResponse, UserLogin, Token, TokenRefresh
+from ..models import User
+from ..schemas import UserCreate, UserResponse, UserLogin, Token, TokenRefresh, UserPage
 from ..auth import (
-    get_password_hash, verify_password, create_access_token, 
-    create_refresh_token, get_current_user, require_admin
+    get_password_hash_async, verify_password_async, create_access_token, 
+    create_refresh_token, get_current_user, require_admin, hash_metrics
 )
 from jose import JWTError, jwt
 from ..config import settings
+from ..pagination import encode_cursor, decode_cursor, split_page
 
 router = APIRouter()
 
@@ -27,7 +28,7 @@ async def register_user(user_data: UserCreate, db: AsyncSession = Depends(get_db
     user = User(
         email=user_data.email,
         username=user_data.username,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
         full_name=user_data.full_name,
         department=user_data.department,
         role=user_data.role
@@ -43,7 +44,7 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).filter(User.username == credentials.username))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not user or not await verify_password_async(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
@@ -84,13 +85,29 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user profile"""
     return current_user
 
-@router.get("/", response_model=List[UserResponse])
+@router.get("/hash-metrics")
+async def get_hash_metrics(current_user: User = Depends(require_admin)):
+    """Password hashing pool queue depth and latency (admin only)"""
+    return hash_metrics.snapshot()
+
+@router.get("/", response_model=Union[List[UserResponse], UserPage])
 async def list_users(
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
-    """List all users (admin only)"""
+    """List all users (admin only); pass ``cursor`` for keyset pagination"""
+    if cursor is not None:
+        query = select(User).order_by(User.id)
+        if cursor:
+            (last_id,) = decode_cursor(cursor, int)
+            query = query.filter(User.id > last_id)
+        result = await db.execute(query.limit(limit + 1))
+        items, has_more = split_page(result.scalars().all(), limit)
+        next_cursor = encode_cursor(items[-1].id) if has_more else None
+        return UserPage(items=items, next_cursor=next_cursor)
+    
     result = await db.execute(select(User).offset(skip).limit(limit))
     return result.scalars().all()
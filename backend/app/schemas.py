@@ -31,6 +31,10 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+class UserPage(BaseModel):
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None
+
 class UserLogin(BaseModel):
     username: str
     password: str
@@ -79,13 +83,61 @@ class AssetResponse(AssetBase):
     status: AssetStatus
     assigned_to: Optional[int] = None
     assignee: Optional[UserResponse] = None
-    qr_code: Optional[str] = None
+    qr_key: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     
     class Config:
         from_attributes = True
 
+class AssetPage(BaseModel):
+    items: List[AssetResponse]
+    next_cursor: Optional[str] = None
+
+class AssetTombstoneResponse(BaseModel):
+    asset_id: int
+    asset_tag: str
+    deleted_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class AssetChanges(BaseModel):
+    changed: List[AssetResponse]
+    deleted: List[AssetTombstoneResponse]
+    next_token: str
+    has_more: bool
+
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+class BulkImportResult(BaseModel):
+    created: int
+    errors: List[BulkRowError]
+
+class BulkCheckout(BaseModel):
+    asset_ids: List[int] = Field(min_length=1, max_length=5000)
+    user_id: int
+    notes: Optional[str] = None
+
+class BulkCheckin(BaseModel):
+    asset_ids: List[int] = Field(min_length=1, max_length=5000)
+    notes: Optional[str] = None
+
+class BulkStatusChange(BaseModel):
+    asset_ids: List[int] = Field(min_length=1, max_length=5000)
+    status: AssetStatus
+    notes: Optional[str] = None
+
+class BulkConflict(BaseModel):
+    asset_id: int
+    error: str
+
+class BulkActionResult(BaseModel):
+    succeeded: List[int]
+    conflicts: List[BulkConflict]
+
 class AssetCheckout(BaseModel):
     user_id: int
     notes: Optional[str] = None
@@ -107,6 +159,10 @@ class AuditLogResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AuditLogPage(BaseModel):
+    items: List[AuditLogResponse]
+    next_cursor: Optional[str] = None
+
 class AuditLogFilter(BaseModel):
     entity_type: Optional[str] = None
     entity_id: Optional[int] = None
@@ -132,7 +188,7 @@ class SearchResult(BaseModel):
 
 # ============== Export Schemas ==============
 class ExportRequest(BaseModel):
-    format: str = Field(default="csv", pattern="^(csv|xlsx)$")
+    format: str = Field(default="csv", pattern="^(csv|xlsx|parquet)$")
     category: Optional[AssetCategory] = None
     status: Optional[AssetStatus] = None
 
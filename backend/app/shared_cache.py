@@ -0,0 +1,181 @@
+"""Cache backends shared by the routers, with cross-worker invalidation.
+
+``CACHE_BACKEND=memory`` (the default) keeps cached values in the worker.
+``CACHE_BACKEND=redis`` stores them in a Redis-protocol server at
+``CACHE_URL`` so every uvicorn worker shares one copy, and fans
+invalidations out over pub/sub so caches that stay per-worker (principals,
+serialized asset reads) drop stale entries in every worker, not just the one
+that committed the change.
+"""
+from typing import Callable, Dict, Iterable, List, Optional
+import asyncio
+import json
+import logging
+import uuid
+from .cache import TTLCache
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+class MemoryBackend:
+    """In-process LRU; publish/listen are no-ops because there is no one else to tell"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize, ttl)
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+    
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        self._cache.set(key, value, ttl)
+    
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._cache.delete(key)
+    
+    async def publish(self, message: str):
+        pass
+    
+    async def listen(self, handler: Callable[[str], None]):
+        await asyncio.Event().wait()
+    
+    async def close(self):
+        self._cache.clear()
+
+class RedisBackend:
+    """Values and invalidation messages in a Redis-protocol server (Redis, Valkey, KeyDB)"""
+    
+    def __init__(self, url: str, prefix: str, client=None):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url)
+        self._redis = client
+        self.prefix = prefix
+        self.channel = f"{prefix}invalidate"
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        # The cache is best-effort: an unreachable server means a miss, not a 500
+        try:
+            return await self._redis.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Cache get failed: {e}")
+            return None
+    
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        try:
+            await self._redis.set(self.prefix + key, value, px=int(ttl * 1000) if ttl else None)
+        except Exception as e:
+            logger.warning(f"Cache set failed: {e}")
+    
+    async def delete(self, *keys: str):
+        if keys:
+            await self._redis.delete(*[self.prefix + k for k in keys])
+    
+    async def publish(self, message: str):
+        await self._redis.publish(self.channel, message)
+    
+    async def listen(self, handler: Callable[[str], None]):
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    data = message["data"]
+                    handler(data.decode() if isinstance(data, bytes) else data)
+        finally:
+            await pubsub.aclose()
+    
+    async def close(self):
+        await self._redis.aclose()
+
+def create_backend():
+    if settings.CACHE_BACKEND == "redis":
+        return RedisBackend(settings.CACHE_URL, settings.CACHE_PREFIX)
+    if settings.CACHE_BACKEND != "memory":
+        raise ValueError(f"Unknown CACHE_BACKEND {settings.CACHE_BACKEND!r}")
+    return MemoryBackend(settings.CACHE_MEMORY_SIZE, settings.CACHE_DEFAULT_TTL)
+
+class InvalidationBus:
+    """Apply an invalidation locally right away, then tell the other workers.
+    
+    ``publish`` is synchronous so SQLAlchemy commit hooks can call it; the
+    shared-key deletes and the pub/sub message are sent from a task.
+    """
+    
+    def __init__(self, backend):
+        self.backend = backend
+        self.origin = uuid.uuid4().hex
+        self._handlers: Dict[str, List[Callable[[list], None]]] = {}
+        self._pending: set = set()
+        self._listener: Optional[asyncio.Task] = None
+        self.metrics = {"published": 0, "received": 0, "send_failures": 0}
+    
+    def on(self, kind: str, handler: Callable[[list], None]):
+        self._handlers.setdefault(kind, []).append(handler)
+    
+    def _apply(self, kind: str, ids: list):
+        for handler in self._handlers.get(kind, []):
+            handler(ids)
+    
+    def publish(self, kind: str, ids: Iterable = (), shared_keys: Iterable[str] = ()):
+        ids, shared_keys = list(ids), list(shared_keys)
+        self._apply(kind, ids)
+        self.metrics["published"] += 1
+        message = json.dumps({"origin": self.origin, "kind": kind, "ids": ids})
+        try:
+            task = asyncio.get_running_loop().create_task(self._send(message, shared_keys))
+        except RuntimeError:
+            return
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+    
+    async def _send(self, message: str, shared_keys: List[str]):
+        try:
+            await self.backend.delete(*shared_keys)
+            await self.backend.publish(message)
+        except Exception as e:
+            self.metrics["send_failures"] += 1
+            logger.error(f"Cache invalidation broadcast failed: {e}")
+    
+    def _receive(self, raw: str):
+        message = json.loads(raw)
+        if message.get("origin") == self.origin:
+            return
+        self.metrics["received"] += 1
+        self._apply(message["kind"], message.get("ids", []))
+    
+    async def _listen_forever(self):
+        while True:
+            try:
+                await self.backend.listen(self._receive)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache invalidation listener failed, reconnecting: {e}")
+            await asyncio.sleep(1)
+    
+    async def start(self):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen_forever())
+    
+    async def stop(self):
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self.backend.close()
+
+shared_cache = create_backend()
+invalidation_bus = InvalidationBus(shared_cache)
+
+async def get_json(key: str) -> Optional[object]:
+    value = await shared_cache.get(key)
+    return json.loads(value) if value is not None else None
+
+async def set_json(key: str, value: object, ttl: Optional[float] = None):
+    await shared_cache.set(key, json.dumps(value).encode(), ttl)
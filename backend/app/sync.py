@@ -0,0 +1,109 @@
+"""Change sequence and tombstones behind the delta sync endpoint.
+
+Every transaction that writes assets takes the next value of one counter row
+and stamps it on each asset it creates or updates, and on a tombstone for each
+asset it deletes. Incrementing the row locks it until commit, so asset writers
+take numbers in commit order. A reader that sees counter value V therefore
+also sees every change numbered V or lower, which makes V a safe sync token.
+The clock is never involved.
+
+The cost: every asset write holds the ``change_sequence`` row lock until it
+commits, so on PostgreSQL asset writes are serialized, one transaction at a
+time. To avoid deadlocks, writers take it before any other shared row (the
+dashboard counters, audit rollups): the ORM does at the first flush, Core
+paths call ``take_change_seq`` before their other statements.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, insert, delete, func, event
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime, timedelta
+import logging
+from .config import settings
+from .models import Asset, AssetTombstone, ChangeSequence
+
+logger = logging.getLogger(__name__)
+
+ASSETS_SEQUENCE = "assets"
+PRUNED_SEQUENCE = "asset_tombstones_pruned"
+
+def _take_change_seq(session: Session) -> int:
+    seq = session.info.get("change_seq")
+    if seq is None:
+        # Core statement on the connection: this may run inside a flush
+        seq = session.connection().execute(
+            update(ChangeSequence.__table__)
+            .where(ChangeSequence.name == ASSETS_SEQUENCE)
+            .values(value=ChangeSequence.value + 1)
+            .returning(ChangeSequence.value)
+        ).scalar_one()
+        session.info["change_seq"] = seq
+    return seq
+
+async def take_change_seq(db: AsyncSession) -> int:
+    """This transaction's change number, for Core UPDATE/INSERT paths that set ``change_seq``"""
+    return await db.run_sync(_take_change_seq)
+
+async def read_sequence(db: AsyncSession, name: str) -> int:
+    result = await db.execute(select(ChangeSequence.value).filter(ChangeSequence.name == name))
+    return result.scalar_one_or_none() or 0
+
+async def ensure_change_sequence(conn: AsyncConnection):
+    """Create the counter rows if missing, continuing after any change numbers already stored.
+    
+    Migration 0003 seeds them. On a database made by ``create_all``, workers
+    starting together may both insert them and the loser's rows are ignored.
+    """
+    existing = set((await conn.execute(select(ChangeSequence.name))).scalars().all())
+    rows = []
+    if ASSETS_SEQUENCE not in existing:
+        highest = max(
+            (await conn.execute(select(func.max(Asset.change_seq)))).scalar() or 0,
+            (await conn.execute(select(func.max(AssetTombstone.change_seq)))).scalar() or 0,
+        )
+        rows.append({"name": ASSETS_SEQUENCE, "value": highest})
+    if PRUNED_SEQUENCE not in existing:
+        rows.append({"name": PRUNED_SEQUENCE, "value": 0})
+    if not rows:
+        return
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(ChangeSequence.__table__)
+        await conn.execute(stmt.on_conflict_do_nothing(index_elements=["name"]), rows)
+    else:
+        await conn.execute(insert(ChangeSequence), rows)
+
+async def prune_tombstones(db: AsyncSession):
+    """Drop tombstones older than SYNC_TOMBSTONE_DAYS; older sync tokens then need a full resync"""
+    cutoff = datetime.utcnow() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    newest = (await db.execute(
+        select(func.max(AssetTombstone.change_seq)).filter(AssetTombstone.deleted_at < cutoff)
+    )).scalar()
+    if newest is None:
+        return
+    await db.execute(delete(AssetTombstone).filter(AssetTombstone.change_seq <= newest))
+    await db.execute(
+        update(ChangeSequence)
+        .filter(ChangeSequence.name == PRUNED_SEQUENCE, ChangeSequence.value < newest)
+        .values(value=newest)
+    )
+    await db.commit()
+    logger.info(f"Pruned sync tombstones through change {newest}")
+
+@event.listens_for(Session, "before_flush")
+def _stamp_asset_changes(session, flush_context, instances):
+    changed = [o for o in session.new if isinstance(o, Asset)]
+    changed += [o for o in session.dirty if isinstance(o, Asset) and session.is_modified(o)]
+    deleted = [o for o in session.deleted if isinstance(o, Asset)]
+    if not changed and not deleted:
+        return
+    seq = _take_change_seq(session)
+    for obj in changed:
+        obj.change_seq = seq
+    for obj in deleted:
+        session.add(AssetTombstone(asset_id=obj.id, asset_tag=obj.asset_tag, change_seq=seq))
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _forget_change_seq(session):
+    session.info.pop("change_seq", None)
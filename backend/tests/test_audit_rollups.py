@@ -0,0 +1,24 @@
+"""Tests for audit rollup bucketing"""
+from datetime import datetime
+from app.audit_rollups import truncate, ceil, _rollup_rows
+
+def test_truncate_and_ceil():
+    ts = datetime(2025, 3, 4, 15, 42, 7, 123)
+    assert truncate(ts, "hour") == datetime(2025, 3, 4, 15)
+    assert truncate(ts, "day") == datetime(2025, 3, 4)
+    assert ceil(ts, "hour") == datetime(2025, 3, 4, 16)
+    assert ceil(ts, "day") == datetime(2025, 3, 5)
+    assert ceil(datetime(2025, 3, 4), "day") == datetime(2025, 3, 4)
+
+def test_rollup_rows_count_per_hour_and_day():
+    entries = [
+        {"action": "create", "entity_type": "asset", "user_id": 1, "timestamp": datetime(2025, 3, 4, 9, 5)},
+        {"action": "create", "entity_type": "asset", "user_id": 1, "timestamp": datetime(2025, 3, 4, 9, 55)},
+        {"action": "create", "entity_type": "asset", "user_id": 1, "timestamp": "2025-03-04T10:01:00"},
+    ]
+    rows = {(r["period"], r["bucket"]): r["count"] for r in _rollup_rows(entries)}
+    assert rows == {
+        ("hour", datetime(2025, 3, 4, 9)): 2,
+        ("hour", datetime(2025, 3, 4, 10)): 1,
+        ("day", datetime(2025, 3, 4)): 3,
+    }
@@ -0,0 +1,38 @@
+"""Tests for in-process cache primitives"""
+import asyncio
+import pytest
+from app.cache import TTLCache, SingleFlight
+
+def test_ttl_cache_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("q", {"category": "laptop"})
+    assert cache.get("q") == {"category": "laptop"}
+    now[0] += 61
+    assert cache.get("q") is None
+    assert len(cache) == 0
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces():
+    calls = 0
+    
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+    
+    flight = SingleFlight()
+    results = await asyncio.gather(*[flight.do("k", work) for _ in range(5)])
+    assert results == [1] * 5
+    assert await flight.do("k", work) == 2
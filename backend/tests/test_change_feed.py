@@ -0,0 +1,51 @@
+"""Tests for the asset change broadcaster"""
+import pytest
+from app.change_feed import ChangeBroadcaster, asset_change, iter_events
+
+def _checkout(asset_id: int, user_id: int) -> dict:
+    return asset_change("updated", asset_id, category="laptop", status="checked_out", assigned_to=user_id,
+                        previous={"category": "laptop", "status": "available", "assigned_to": None})
+
+@pytest.mark.asyncio
+async def test_filters_match_new_or_previous_state():
+    feed = ChangeBroadcaster(buffer_size=10, queue_size=10)
+    available = feed.subscribe({"status": {"available"}})
+    mice = feed.subscribe({"category": {"mouse"}})
+    other_asset = feed.subscribe({"asset_id": {99}, "status": {"checked_out"}})
+    
+    feed.publish([_checkout(1, 7)])
+    
+    assert available.queue.get_nowait().change["asset_id"] == 1
+    assert mice.queue.empty()
+    assert other_asset.queue.empty()
+    assert feed.metrics["deliveries"] == 1
+
+def test_resume_replays_missed_events_or_asks_for_reset():
+    feed = ChangeBroadcaster(buffer_size=3, queue_size=10)
+    feed.publish([_checkout(i, 7) for i in range(1, 6)])
+    
+    assert [e.seq for e in feed.subscribe({}, last_event_id=f"{feed.epoch}-3").backlog] == [4, 5]
+    assert feed.subscribe({}, last_event_id=f"{feed.epoch}-5").backlog == []
+    # Event 2 has left the buffer, and 9 was never sent by this worker
+    assert feed.subscribe({}, last_event_id=f"{feed.epoch}-1").backlog is None
+    assert feed.subscribe({}, last_event_id=f"{feed.epoch}-9").backlog is None
+
+def test_event_ids_from_another_worker_ask_for_reset():
+    feed = ChangeBroadcaster(buffer_size=10, queue_size=10)
+    other = ChangeBroadcaster(buffer_size=10, queue_size=10)
+    feed.publish([_checkout(i, 7) for i in range(1, 6)])
+    other.publish([_checkout(1, 7)])
+    
+    assert feed.subscribe({}, last_event_id=f"{other.epoch}-1").backlog is None
+    assert feed.subscribe({}, last_event_id="3").backlog is None
+    assert feed.subscribe({}, last_event_id=f"{feed.epoch}-3").backlog[0].change["id"] == f"{feed.epoch}-4"
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_dropped_after_draining():
+    feed = ChangeBroadcaster(buffer_size=10, queue_size=2)
+    slow = feed.subscribe({})
+    feed.publish([_checkout(i, 7) for i in range(1, 4)])
+    
+    assert slow.overflowed
+    assert feed.snapshot()["subscribers"] == 0
+    assert [e.seq async for e in iter_events(slow)] == [1, 2]
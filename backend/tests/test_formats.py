@@ -0,0 +1,81 @@
+"""Tests for bulk read content negotiation and encoders"""
+import io
+import json
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+from starlette.requests import Request
+from app.formats import negotiate, parse_fieldset, render, ASSET_FIELDS
+from app.models import AssetCategory, AssetStatus
+
+def request(accept=None):
+    headers = [(b"accept", accept.encode())] if accept else []
+    return Request({"type": "http", "headers": headers})
+
+def test_negotiate():
+    assert negotiate(request()) == "json"
+    assert negotiate(request("application/msgpack")) == "msgpack"
+    assert negotiate(request("application/json;q=0.5, application/vnd.apache.arrow.stream")) == "arrow"
+    assert negotiate(request("text/html, */*;q=0.1")) == "json"
+    assert negotiate(request("application/msgpack"), "parquet") == "parquet"
+    with pytest.raises(HTTPException) as exc:
+        negotiate(request("text/html, application/msgpack;q=0"))
+    assert exc.value.status_code == 406
+
+def test_parse_fieldset():
+    assert parse_fieldset(None, None) == (ASSET_FIELDS, True)
+    assert parse_fieldset(None, "") == (ASSET_FIELDS, False)
+    assert parse_fieldset("status, name", None) == (["name", "id", "status"], False)
+    assert parse_fieldset("name", "assignee") == (["name", "id", "assigned_to"], True)
+    for fields, include in (("name,password", None), (None, "history")):
+        with pytest.raises(HTTPException) as exc:
+            parse_fieldset(fields, include)
+        assert exc.value.status_code == 400
+
+def rows():
+    now = datetime(2024, 1, 1, 12, 0)
+    base = {f: None for f in ASSET_FIELDS}
+    return [
+        {**base, "id": i, "name": f"Laptop {i}", "asset_tag": f"AST-{i}", "category": AssetCategory.LAPTOP,
+         "status": AssetStatus.CHECKED_OUT, "assigned_to": 7, "metadata": {"ram": 16},
+         "created_at": now, "updated_at": now}
+        for i in (1, 2)
+    ]
+
+USERS = {7: {"email": "a@x.com", "username": "ada", "full_name": "Ada", "department": "IT", "id": 7,
+             "role": "user", "is_active": True, "created_at": datetime(2023, 1, 1)}}
+
+def test_json_keeps_asset_response_shape():
+    page = json.loads(render("json", rows(), USERS, paged=True, next_cursor="abc"))
+    assert page["next_cursor"] == "abc"
+    assert page["items"][0]["assignee"]["username"] == "ada"
+    assert page["items"][0]["category"] == "laptop"
+    assert page["items"][0]["created_at"] == "2024-01-01T12:00:00"
+
+def test_msgpack_sends_each_assignee_once():
+    msgpack = pytest.importorskip("msgpack")
+    body = msgpack.unpackb(render("msgpack", rows(), USERS))
+    assert [u["id"] for u in body["users"]] == [7]
+    assert [a["assigned_to"] for a in body["items"]] == [7, 7]
+    assert "assignee" not in body["items"][0]
+
+def test_arrow_dictionary_encodes_assignees():
+    pa = pytest.importorskip("pyarrow")
+    table = pa.ipc.open_stream(render("arrow", rows(), USERS, next_cursor="abc")).read_all()
+    assert table.schema.metadata[b"next_cursor"] == b"abc"
+    username = table.column("assignee_username").combine_chunks()
+    assert username.dictionary.to_pylist() == ["ada"]
+    assert username.to_pylist() == ["ada", "ada"]
+
+def test_sparse_rows_without_assignee():
+    sparse = [{"id": 1, "name": "Laptop 1"}]
+    assert json.loads(render("json", sparse, None, ["name", "id"])) == [{"name": "Laptop 1", "id": 1}]
+    pa = pytest.importorskip("pyarrow")
+    table = pa.ipc.open_stream(render("arrow", sparse, None, ["name", "id"])).read_all()
+    assert table.column_names == ["name", "id"]
+
+def test_parquet_round_trip():
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = pq.read_table(io.BytesIO(render("parquet", rows(), USERS)))
+    assert table.column("status").to_pylist() == ["checked_out", "checked_out"]
+    assert table.column("metadata").to_pylist() == ['{"ram":16}', '{"ram":16}']
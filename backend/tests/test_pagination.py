@@ -0,0 +1,32 @@
+"""Tests for cursor pagination helpers"""
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+from app.pagination import encode_cursor, decode_cursor, split_page
+
+def test_cursor_round_trip():
+    ts = datetime(2024, 1, 15, 9, 30)
+    cursor = encode_cursor(ts, 42)
+    assert decode_cursor(cursor, datetime, int) == [ts, 42]
+
+def test_invalid_cursor_rejected():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor", int)
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException):
+        decode_cursor(encode_cursor(1, 2), int)
+
+def test_cursor_value_types_checked():
+    for values, types in [
+        (["x"], (int,)),
+        ([True], (int,)),
+        (["yesterday", 1], (datetime, int)),
+        ([1.5, 1], (datetime, int)),
+    ]:
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor(encode_cursor(*values), *types)
+        assert exc.value.status_code == 400
+
+def test_split_page():
+    assert split_page([1, 2, 3], 2) == ([1, 2], True)
+    assert split_page([1, 2], 2) == ([1, 2], False)
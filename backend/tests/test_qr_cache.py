@@ -0,0 +1,19 @@
+"""Tests for the QR code LRU"""
+from app.qr_cache import QRCodeCache
+
+def test_lru_eviction():
+    cache = QRCodeCache(maxsize=2)
+    cache.put("AST-1", b"one")
+    cache.put("AST-2", b"two")
+    assert cache.get("AST-1") == b"one"
+    cache.put("AST-3", b"three")
+    assert cache.get("AST-2") is None
+    assert cache.get("AST-1") == b"one"
+    assert len(cache) == 2
+
+def test_discard():
+    cache = QRCodeCache(maxsize=2)
+    cache.put("AST-1", b"one")
+    cache.discard("AST-1")
+    cache.discard("AST-missing")
+    assert cache.get("AST-1") is None
@@ -0,0 +1,43 @@
+"""Tests for the content-addressed QR image store"""
+import pytest
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from app.database import Base
+from app.models import Asset, AssetCategory, QRImage
+from app.qr_store import qr_key, asset_qr_key, load_qr_images, save_qr_image, fill_qr_keys
+
+def test_key_depends_only_on_payload():
+    assert qr_key("asset://AST-1") == qr_key("asset://AST-1")
+    assert qr_key("asset://AST-1") != qr_key("asset://AST-2")
+    assert len(qr_key("asset://AST-1")) == 64
+
+@pytest.mark.asyncio
+async def test_save_is_idempotent(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'qr.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(QRImage.__table__.create)
+    key = qr_key("asset://AST-1")
+    async with AsyncSession(engine) as db:
+        await save_qr_image(db, key, b"first")
+        await save_qr_image(db, key, b"second")
+        await db.commit()
+        assert await load_qr_images(db, [key, qr_key("asset://missing")]) == {key: b"first"}
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_fill_qr_keys_is_not_an_asset_change(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'qr.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Asset), [{"asset_tag": "AST-1", "name": "Laptop", "category": AssetCategory.LAPTOP}])
+    async with AsyncSession(engine) as db:
+        asset = (await db.execute(select(Asset))).scalar_one()
+        updated_at = asset.updated_at
+        await fill_qr_keys(db, [asset])
+        assert asset.qr_key == asset_qr_key("AST-1")
+        assert not db.dirty
+        await db.commit()
+    async with AsyncSession(engine) as db:
+        asset = (await db.execute(select(Asset))).scalar_one()
+        assert (asset.qr_key, asset.change_seq, asset.updated_at) == (asset_qr_key("AST-1"), 0, updated_at)
+    await engine.dispose()
@@ -0,0 +1,32 @@
+"""Tests for the local rule-based search parser"""
+from app.query_parser import build_vocabulary, parse_query_locally
+
+VOCAB = build_vocabulary(["Engineering", "Marketing"], ["John Smith", "Jane Doe"])
+
+def test_structured_query_parsed_locally():
+    params = parse_query_locally("show me all laptops assigned to engineering", VOCAB)
+    assert params["category"] == "laptop"
+    assert params["department"] == "Engineering"
+    assert params["keywords"] == []
+
+def test_keywords_and_status():
+    params = parse_query_locally("Dell laptops in maintenance", VOCAB)
+    assert params["category"] == "laptop"
+    assert params["status"] == "maintenance"
+    assert params["keywords"] == ["dell"]
+
+def test_person_and_unassigned():
+    assert parse_query_locally("what does John Smith have?", VOCAB)["assigned_to_name"] == "John Smith"
+    assert parse_query_locally("unassigned headsets", VOCAB)["unassigned"] is True
+
+def test_ambiguous_queries_fall_back():
+    assert parse_query_locally("laptops not in maintenance", VOCAB) is None
+    assert parse_query_locally("laptops or monitors", VOCAB) is None
+    assert parse_query_locally("the thing bob mentioned last week", VOCAB) is None
+    assert parse_query_locally("macbook", VOCAB) is None
+
+def test_unknown_owner_falls_back():
+    assert parse_query_locally("laptops assigned to bob", VOCAB) is None
+    assert parse_query_locally("monitors owned by the design team", VOCAB) is None
+    assert parse_query_locally("laptops assigned to jane doe", VOCAB)["assigned_to_name"] == "Jane Doe"
+    assert parse_query_locally("dell laptops assigned to marketing", VOCAB)["keywords"] == ["dell"]
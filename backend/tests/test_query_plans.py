@@ -0,0 +1,122 @@
+"""Query-plan regression tests for the hot router queries.
+
+Statements come from the query builders the routers use, so changing a
+router's query changes what is checked. Each query is EXPLAINed against
+SQLite and, when ``TEST_POSTGRES_URL`` is set (e.g.
+``postgresql+asyncpg://localhost/asset_tracker_test``), against PostgreSQL.
+A plan that scans a whole table instead of using an index fails.
+"""
+import os
+import re
+import pytest
+import pytest_asyncio
+from datetime import datetime
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from app.database import Base
+from app.models import Asset, AssetCategory, AssetStatus, AuditLog, CheckoutHistory, User
+from app.formats import ASSET_FIELDS, asset_row_query
+from app.fulltext import apply_text_search, ensure_search_index, tokenize
+from app.pagination import encode_cursor
+from app.routers.assets import asset_list_query, asset_changes_queries
+from app.routers.audit import audit_log_query, audit_keyset
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+    
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(Explain, "sqlite")
+def _explain_sqlite(element, compiler, **kw):
+    return "EXPLAIN QUERY PLAN " + compiler.process(element.statement, **kw)
+
+@compiles(Explain, "postgresql")
+def _explain_postgresql(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+SINCE = datetime(2024, 1, 1)
+
+def hot_queries(dialect: str) -> dict:
+    """The routers' statements, built by the same functions they use"""
+    changed, deleted = asset_changes_queries(5, 1, 9, 500)
+    return {
+        "list_assets by status": asset_list_query(ASSET_FIELDS, status_filter=AssetStatus.AVAILABLE),
+        "list_assets by category": asset_list_query(ASSET_FIELDS, category=AssetCategory.LAPTOP),
+        "list_assets by category and status": asset_list_query(
+            ASSET_FIELDS, category=AssetCategory.LAPTOP, status_filter=AssetStatus.AVAILABLE
+        ),
+        "list_assets by assignee": asset_list_query(ASSET_FIELDS, assigned_to=1),
+        "list_assets page": asset_list_query(ASSET_FIELDS, status_filter=AssetStatus.AVAILABLE)
+            .filter(Asset.id > 100)
+            .order_by(Asset.id)
+            .limit(101),
+        "basic_search": apply_text_search(asset_row_query(), tokenize("dell latitude"), dialect),
+        "get_asset_by_tag": select(Asset).filter(Asset.asset_tag == "AST-00000001"),
+        "create_asset serial check": select(Asset).filter(Asset.serial_number == "SN-1"),
+        "checkin open checkout": select(CheckoutHistory).filter(
+            CheckoutHistory.asset_id == 1, CheckoutHistory.checkin_date == None
+        ),
+        "get_asset_history": select(CheckoutHistory)
+            .filter(CheckoutHistory.asset_id == 1)
+            .order_by(CheckoutHistory.checkout_date.desc()),
+        "get_entity_audit_trail": audit_log_query(entity_type="asset", entity_id=1),
+        "get_user_audit_trail": audit_log_query(user_id=1).limit(100),
+        "dashboard recent activity": audit_log_query(entity_type="asset").limit(10),
+        "list_audit_logs by date": audit_log_query(start_date=SINCE),
+        "list_audit_logs page": audit_keyset(audit_log_query(start_date=SINCE), encode_cursor(SINCE, 10))
+            .limit(101),
+        "get_audit_summary": select(AuditLog.action, func.count(AuditLog.id))
+            .filter(AuditLog.timestamp >= SINCE)
+            .group_by(AuditLog.action),
+        "login": select(User).filter(User.username == "admin"),
+        "asset changes": changed,
+        "asset change tombstones": deleted,
+    }
+
+ENGINES = ["sqlite"]
+if os.getenv("TEST_POSTGRES_URL"):
+    ENGINES.append("postgresql")
+
+@pytest_asyncio.fixture(params=ENGINES)
+async def plan_conn(request, tmp_path):
+    if request.param == "sqlite":
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'plans.db'}")
+    else:
+        engine = create_async_engine(os.environ["TEST_POSTGRES_URL"])
+    async with engine.connect() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await ensure_search_index(conn)
+        if conn.dialect.name == "postgresql":
+            # Empty tables would otherwise always be seq-scanned
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+        yield conn
+        await conn.rollback()
+    await engine.dispose()
+
+def _sqlite_full_scans(rows) -> list:
+    # "SCAN assets" is a full scan; "SCAN assets USING INDEX ..." walks an index
+    return [
+        detail for *_, detail in rows
+        if re.match(r"SCAN \w+$", detail)
+    ]
+
+def _postgres_full_scans(plan: dict) -> list:
+    found = []
+    if plan["Node Type"] == "Seq Scan":
+        found.append(f"Seq Scan on {plan['Relation Name']}")
+    for child in plan.get("Plans", []):
+        found.extend(_postgres_full_scans(child))
+    return found
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", sorted(hot_queries("sqlite")))
+async def test_hot_query_uses_index(plan_conn, name):
+    result = await plan_conn.execute(Explain(hot_queries(plan_conn.dialect.name)[name]))
+    if plan_conn.dialect.name == "postgresql":
+        full_scans = _postgres_full_scans(result.scalar()[0]["Plan"])
+    else:
+        full_scans = _sqlite_full_scans(result.fetchall())
+    assert not full_scans, f"{name} regressed to a full scan: {full_scans}"
@@ -0,0 +1,51 @@
+"""Tests for read-replica routing"""
+import pytest
+from sqlalchemy.exc import DBAPIError, OperationalError
+from app.database import ReplicaRouter, is_connection_error, replicas
+
+@pytest.fixture
+def router(tmp_path):
+    return ReplicaRouter([
+        f"sqlite+aiosqlite:///{tmp_path / 'replica-a.db'}",
+        f"sqlite+aiosqlite:///{tmp_path / 'replica-b.db'}",
+    ])
+
+def test_round_robin_skips_unhealthy_replicas(router):
+    assert [router.pick("c") for _ in range(4)] == [0, 1, 0, 1]
+    router.mark_down(0, "test")
+    assert [router.pick("c") for _ in range(3)] == [1, 1, 1]
+    router.mark_down(1, "test")
+    assert router.pick("c") is None
+    assert router.metrics["failovers"] == 2
+
+def test_no_replicas_reads_primary():
+    assert ReplicaRouter([]).pick("c") is None
+
+@pytest.mark.asyncio
+async def test_writer_reads_primary_until_window_passes(router):
+    router._pin(["writer"])
+    assert router.pick("writer") is None
+    assert router.pick("someone-else") == 0
+    # note_write pins through the invalidation bus, in this worker right away
+    replicas.note_write("writer")
+    assert replicas._recent_writers.get("writer")
+
+@pytest.mark.asyncio
+async def test_health_check_restores_replica(router, tmp_path):
+    router.mark_down(0, "test")
+    await router.check()
+    assert router.healthy == [True, True]
+    assert router.lag_seconds == [0.0, 0.0]
+    
+    router.engines[1] = ReplicaRouter([f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'x.db'}"]).engines[0]
+    await router.check()
+    assert router.healthy == [True, False]
+    await router.stop()
+
+def test_only_connection_errors_take_a_replica_down():
+    assert is_connection_error(ConnectionRefusedError())
+    assert is_connection_error(OperationalError(None, None, Exception("could not connect")))
+    assert is_connection_error(DBAPIError("SELECT 1", None, Exception("closed"), connection_invalidated=True))
+    # Statement timeouts and bad queries are the handler's problem
+    assert not is_connection_error(OperationalError("SELECT pg_sleep(60)", None, Exception("canceling statement")))
+    assert not is_connection_error(DBAPIError("SELECT nope", None, Exception("syntax error")))
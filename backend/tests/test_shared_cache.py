@@ -0,0 +1,50 @@
+"""Tests for the shared cache backends and cross-worker invalidation"""
+import asyncio
+import pytest
+from app.shared_cache import MemoryBackend, RedisBackend, InvalidationBus
+
+@pytest.mark.asyncio
+async def test_memory_backend_round_trip():
+    backend = MemoryBackend(maxsize=10, ttl=60)
+    await backend.set("k", b"v")
+    assert await backend.get("k") == b"v"
+    await backend.set("short", b"v", ttl=0.01)
+    await asyncio.sleep(0.02)
+    assert await backend.get("short") is None
+    await backend.delete("k")
+    assert await backend.get("k") is None
+
+@pytest.mark.asyncio
+async def test_redis_backend_round_trip():
+    fakeredis = pytest.importorskip("fakeredis")
+    backend = RedisBackend("redis://unused", "test:", client=fakeredis.FakeAsyncRedis())
+    await backend.set("k", b"v", ttl=60)
+    assert await backend.get("k") == b"v"
+    await backend.delete("k")
+    assert await backend.get("k") is None
+
+@pytest.mark.asyncio
+async def test_invalidation_reaches_other_workers_once():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    workers = [
+        InvalidationBus(RedisBackend("redis://unused", "test:", client=fakeredis.FakeAsyncRedis(server=server)))
+        for _ in range(2)
+    ]
+    seen = [[], []]
+    for bus, log in zip(workers, seen):
+        bus.on("assets", log.append)
+        await bus.start()
+    await asyncio.sleep(0.05)
+    
+    await workers[0].backend.set("dashboard", b"stale")
+    workers[0].publish("assets", [1, 2], shared_keys=["dashboard"])
+    for _ in range(50):
+        if seen[1]:
+            break
+        await asyncio.sleep(0.01)
+    
+    assert seen == [[[1, 2]], [[1, 2]]]
+    assert await workers[1].backend.get("dashboard") is None
+    for bus in workers:
+        await bus.stop()